@@ -0,0 +1,130 @@
+import gc
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import CST
+from BEN.Generator import ProjectGenerator
+from Efficiency import cal_antenna_eff_map, export_antenna_eff_map, extract_antennas
+
+
+class Benchmark(object):
+    """
+    在合成工程上分阶段测量 解析→计算→导出 流水线
+    每个阶段重复 repeat 次取最短耗时; 峰值内存 (tracemalloc) 单独测量一次, 不影响计时
+    """
+    STAGES: tuple[str, ...] = ("extract_graph", "parse_sig_file", "parse_ffs_file", "cal_antenna_eff_map",
+                               "export_antenna_eff_map")
+    FREQ_TEXT: str = "n1, n3, n28, n41, n78, B3, B7, B40, 1000~2000 MHz, 2450 MHz"
+
+    def __init__(self, repeat: int = 3, freq_text: str = FREQ_TEXT):
+        self.__repeat = repeat
+        self.__freq_text = freq_text
+
+    def run(self, generators: list[ProjectGenerator],
+            progress: Callable[[str], None] | None = None) -> dict:
+        """返回 {"meta": {...}, "results": [{"case", "stage", "seconds", "peak_bytes", ...}]}"""
+        results: list[dict] = []
+        for _generator in generators:
+            case = f"ant{_generator.antenna_count}_m{_generator.sample_count}"
+            with tempfile.TemporaryDirectory(prefix="autoeff_bench_") as __root:
+                cst_file = _generator.generate(Path(__root), case)
+                for ___stage, ___seconds, ___peak_bytes in self.__run_case(Path(__root), cst_file):
+                    results.append({"case": case, "stage": ___stage, "seconds": ___seconds,
+                                    "peak_bytes": ___peak_bytes, "antennas": _generator.antenna_count,
+                                    "samples": _generator.sample_count})
+                    if progress is not None:
+                        progress(f"{case:<20} {___stage:<24} {___seconds * 1e3:10.2f} ms "
+                                 f"{___peak_bytes / 1024 ** 2:10.2f} MiB")
+        return {"meta": {"created": datetime.now().isoformat(timespec="seconds"),
+                         "python": platform.python_version(), "platform": platform.platform(),
+                         "repeat": self.__repeat, "freq_text": self.__freq_text},
+                "results": results}
+
+    def __run_case(self, root: Path, cst_file: Path):
+        cst = CST.Contents(cst_file)
+        sig_graphs = [_graph for _graph in CST.Graph.parse_model_res(cst.model_res) if _graph.is_sig()]
+        ffs_graphs = [_graph for _graph in CST.Graph.parse_model_res(cst.model_res)
+                      if _graph.files.endswith(".ffs")]
+        antenna_table = [(_antenna_name, _graph_name, self.__freq_text)
+                         for _antenna_name, _graph_name in extract_antennas(cst)]
+        antenna_eff_map = cal_antenna_eff_map(cst, antenna_table)
+        export_dir = root / "export"
+        export_dir.mkdir()
+
+        def cold_eff_map():
+            # 每次使用新的工程对象, 并清空它自己的图表缓存 (上一次调用写入的索引与数组), 测量冷启动
+            cold_cst = CST.Contents(cst_file)
+            cold_cst.chart_cache.clear()
+            return cal_antenna_eff_map(cold_cst, antenna_table)
+
+        stages: dict[str, Callable] = {
+            "extract_graph": lambda: CST.Graph.extract_graph(cst.model_res, "1D Results"),
+            "parse_sig_file": lambda: [CST.LineChart.parse_sig_file(cst.result_dir, _graph)
+                                       for _graph in sig_graphs],
+            "parse_ffs_file": lambda: [CST.FieldChart.parse_ffs_file(cst.result_dir, _graph)
+                                       for _graph in ffs_graphs],
+            "cal_antenna_eff_map": cold_eff_map,
+            "export_antenna_eff_map": lambda: export_antenna_eff_map(antenna_eff_map, export_dir),
+        }
+        for _stage in self.STAGES:
+            if _stage == "parse_ffs_file" and not ffs_graphs:
+                continue
+            yield _stage, self.__time(stages[_stage]), self.__peak_bytes(stages[_stage])
+
+    def __time(self, function: Callable) -> float:
+        seconds: list[float] = []
+        for _ in range(self.__repeat):
+            gc.collect()
+            start = time.perf_counter()
+            function()
+            seconds.append(time.perf_counter() - start)
+        return min(seconds)
+
+    @staticmethod
+    def __peak_bytes(function: Callable) -> int:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    @staticmethod
+    def save(report: dict, json_file: Path) -> Path:
+        with open(json_file, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return json_file
+
+    @staticmethod
+    def load(json_file: Path) -> dict:
+        with open(json_file, mode="r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def compare(report: dict, baseline: dict, threshold: float = 0.2,
+                min_seconds: float = 1e-3) -> list[dict]:
+        """
+        与基线逐项比较 (case, stage), 返回全部对比行; 耗时或峰值内存超过基线 (1 + threshold) 倍的行 regression 为 True
+        基线耗时低于 min_seconds 的阶段不判定耗时回退, 避免计时噪声
+        """
+        baseline_map: dict[tuple[str, str], dict] = {(_result["case"], _result["stage"]): _result
+                                                     for _result in baseline["results"]}
+        rows: list[dict] = []
+        for _result in report["results"]:
+            base = baseline_map.get((_result["case"], _result["stage"]))
+            if base is None:
+                continue
+            time_ratio = _result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+            memory_ratio = _result["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else 1.0
+            regression = ((time_ratio > 1.0 + threshold and base["seconds"] >= min_seconds) or
+                          memory_ratio > 1.0 + threshold)
+            rows.append({"case": _result["case"], "stage": _result["stage"], "time_ratio": time_ratio,
+                         "memory_ratio": memory_ratio, "regression": regression})
+        return rows
@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import numpy as np
+
+
+class ProjectGenerator(object):
+    """
+    生成与 CST.Contents 目录结构一致的合成工程:
+    <root>/<name>.cst, <root>/<name>/Result/Model.res 以及其引用的 .sig/.ffs 文件
+    每个天线端口 [ACi] 生成 System Tot. Efficiency / Rad. Efficiency (实数) 与 S 参数 (complex_data 为 True 时为复数) 曲线,
+    field_count > 0 时生成远场 "farfield (f=...) [ACi]"; coupling 为 True 时另外生成端口间的 Si,j;
+    其余图用填充曲线补足到 graph_count
+    """
+
+    def __init__(self, antenna_count: int = 8, sample_count: int = 1001, graph_count: int = 0,
+                 complex_data: bool = False, field_count: int = 0, angle_step: float = 5.0,
+                 freq_range: tuple[float, float] = (0.5, 6.0), coupling: bool = False, seed: int = 0):
+        self.__antenna_count = antenna_count
+        self.__sample_count = sample_count
+        self.__graph_count = graph_count
+        self.__complex_data = complex_data
+        self.__field_count = field_count
+        self.__angle_step = angle_step
+        self.__freq_range = freq_range
+        self.__coupling = coupling
+        self.__seed = seed
+
+    @property
+    def antenna_count(self):
+        return self.__antenna_count
+
+    @property
+    def sample_count(self):
+        return self.__sample_count
+
+    def generate(self, root: Path, name: str = "synthetic") -> Path:
+        """写出工程并返回 .cst 文件路径"""
+        rng = np.random.default_rng(self.__seed)
+        cst_file = Path(root) / f"{name}.cst"
+        result_dir = Path(root) / name / "Result"
+        result_dir.mkdir(parents=True, exist_ok=True)
+        cst_file.touch()
+
+        x = np.linspace(*self.__freq_range, self.__sample_count)
+        entries: list[tuple[str, str, str, str]] = []
+        for i in range(self.__antenna_count):
+            tag = f"[AC{i + 1}]"
+            self.__write_sig(result_dir / f"sys_eff_{i + 1}.sig", x, self.__efficiency(rng, x, 0.0))
+            entries.append(("XYSIGNAL2", "real", f"1D Results\\Efficiencies\\System Tot. Efficiency {tag}",
+                            f"sys_eff_{i + 1}.sig"))
+            self.__write_sig(result_dir / f"rad_eff_{i + 1}.sig", x, self.__efficiency(rng, x, 0.1))
+            entries.append(("XYSIGNAL2", "real", f"1D Results\\Efficiencies\\Rad. Efficiency {tag}",
+                            f"rad_eff_{i + 1}.sig"))
+            s_values = self.__reflection(rng, x) * (0.85 if self.__coupling else 1.0)
+            self.__write_sig(result_dir / f"s{i + 1}_{i + 1}.sig", x,
+                             s_values if self.__complex_data else np.abs(s_values))
+            entries.append(("XYSIGNAL2", "complex" if self.__complex_data else "real",
+                            f"1D Results\\S-Parameters\\S{i + 1},{i + 1}", f"s{i + 1}_{i + 1}.sig"))
+            for j, _freq in enumerate(np.linspace(*self.__freq_range, self.__field_count + 2)[1:-1]):
+                file_name = f"farfield_{i + 1}_{j + 1}.ffs"
+                self.__write_ffs(result_dir / file_name, rng)
+                entries.append(("FARFIELD", "", f"Farfields\\farfield (f={_freq:.3f}) {tag}", file_name))
+
+        if self.__coupling:
+            # 互易网络: Sj,i 与 Si,j 相同
+            for i in range(self.__antenna_count):
+                for j in range(i + 1, self.__antenna_count):
+                    s_values = self.__transmission(rng, x)
+                    for _a, _b in ((i, j), (j, i)):
+                        self.__write_sig(result_dir / f"s{_a + 1}_{_b + 1}.sig", x,
+                                         s_values if self.__complex_data else np.abs(s_values))
+                        entries.append(("XYSIGNAL2", "complex" if self.__complex_data else "real",
+                                        f"1D Results\\S-Parameters\\S{_a + 1},{_b + 1}", f"s{_a + 1}_{_b + 1}.sig"))
+
+        for i in range(len(entries), self.__graph_count):
+            self.__write_sig(result_dir / f"misc_{i + 1}.sig", x, rng.standard_normal(x.size))
+            entries.append(("XYSIGNAL2", "real", f"1D Results\\Misc\\Signal {i + 1}", f"misc_{i + 1}.sig"))
+
+        self.__write_model_res(result_dir / "Model.res", entries)
+        return cst_file
+
+    def __efficiency(self, rng: np.random.Generator, x: np.ndarray, offset: float) -> np.ndarray:
+        # 若干谐振峰叠加在底噪上, 取值范围 (0, 1)
+        y = np.full(x.size, 0.05 + offset)
+        for _center in rng.uniform(*self.__freq_range, size=3):
+            y += rng.uniform(0.3, 0.6) / (1.0 + ((x - _center) / rng.uniform(0.1, 0.5)) ** 2)
+        return np.clip(y + rng.normal(0.0, 0.005, x.size), 1e-4, 0.999)
+
+    def __reflection(self, rng: np.random.Generator, x: np.ndarray) -> np.ndarray:
+        center, width = rng.uniform(*self.__freq_range), rng.uniform(0.05, 0.3)
+        magnitude = 1.0 - 0.9 / (1.0 + ((x - center) / width) ** 2)
+        return magnitude * np.exp(-1j * 2.0 * np.pi * x / self.__freq_range[1] * 8.0)
+
+    def __transmission(self, rng: np.random.Generator, x: np.ndarray) -> np.ndarray:
+        # 端口间耦合的相位随频率线性变化; 幅值上限随端口数降低, 与 0.85 倍的反射系数一起保持网络无源
+        upper_db = 10.0 * np.log10(0.25 / (max(self.__antenna_count - 1, 1) * 2.25))
+        magnitude = (10.0 ** (rng.uniform(upper_db - 20.0, upper_db) / 20.0) *
+                     (1.0 + 0.5 * np.sin(x * rng.uniform(1.0, 4.0))))
+        return magnitude * np.exp(-1j * 2.0 * np.pi * x * rng.uniform(0.5, 2.0))
+
+    def __write_sig(self, sig_file: Path, x: np.ndarray, y: np.ndarray) -> None:
+        columns = [x, y.real, y.imag] if np.iscomplexobj(y) else [x, y]
+        header = f"#Parameters = {{}}\n#Result = {sig_file.stem}\n#\n#{'-' * 40}"
+        np.savetxt(sig_file, np.column_stack(columns), fmt="%.9g", delimiter="\t", header=header, comments="")
+
+    def __write_ffs(self, ffs_file: Path, rng: np.random.Generator) -> None:
+        # 按 (phi, theta) 网格写出 6 列: Phi, Theta, Re/Im(E_Theta), Re/Im(E_Phi)
+        # 幅值使 0.5 W 激励下的总效率 (TRP/P_stim) 约为 0.3~0.9
+        phi, theta = np.meshgrid(np.arange(0.0, 360.0, self.__angle_step),
+                                 np.arange(0.0, 180.0 + self.__angle_step / 2, self.__angle_step), indexing="ij")
+        phi, theta = phi.ravel(), theta.ravel()
+        pattern = np.sin(np.deg2rad(theta)) * rng.uniform(3.5, 6.0)
+        e_theta = pattern * np.exp(1j * rng.uniform(0.0, 2.0 * np.pi, phi.size))
+        e_phi = 0.1 * pattern * np.cos(np.deg2rad(phi))
+        data = np.column_stack([phi, theta, e_theta.real, e_theta.imag, e_phi, np.zeros(phi.size)])
+        header = (f"// far field\n// {ffs_file.stem}\n// Stimulated Power = 0.5\n"
+                  f"// Phi Theta Re(E_Theta) Im(E_Theta) Re(E_Phi) Im(E_Phi)")
+        np.savetxt(ffs_file, data, fmt="%.9g", delimiter=" ", header=header, comments="")
+
+    @staticmethod
+    def __write_model_res(model_res: Path, entries: list[tuple[str, str, str, str]]) -> None:
+        lines: list[str] = ["[Model.res]", f"num=i:{len(entries)}", ""]
+        for _type, _subtype, _treepath, _files in entries:
+            lines += [f"type=s:{_type}", f"subtype=s:{_subtype}", "problemclass=s:::8:1000",
+                      "visibility=s:visible", "creation=s:internal", "lifetime=s:rebuild", "result=s:1",
+                      f"treepath=s:{_treepath}", f"files=s:{_files}", ""]
+        with open(model_res, mode="w") as f:
+            f.write("\n".join(lines) + "\n")
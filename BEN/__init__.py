@@ -0,0 +1,2 @@
+from .Benchmark import Benchmark
+from .Generator import ProjectGenerator
\ No newline at end of file
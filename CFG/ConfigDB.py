@@ -1,126 +1,220 @@
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterable
 import sqlite3 as sqlite
 
 
 class ConfigDB(object):
-    def __init__(self, db_file: Path):
+    """
+    基于 SQLite 的分区键值存储, 每个分区对应一张以 key 为主键的表
+    所有语句均为参数化语句 (由 sqlite3 的语句缓存复用), 单条写操作自动提交,
+    批量写入可放在 transaction() 中; cache 为 True 时启用进程内读缓存
+    """
+
+    def __init__(self, db_file: Path, cache: bool = False):
         self.file = db_file
-        self.__db = sqlite.connect(self.file)
-        self.__cursor = self.__db.cursor()
+        # isolation_level=None: 由本类显式管理事务
+        self.__db = sqlite.connect(self.file, isolation_level=None)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        self.__transaction_depth: int = 0
+        self.__cache: dict[str, dict[str, str]] | None = {} if cache else None
+        self.__section_names: set[str] = set(self.__query_section_names())
         self.create_section("Global")
 
     def select_section_names(self) -> list[str]:
-        sql: str = f"""
-        SELECT name FROM sqlite_master WHERE type="table" ORDER BY name
-"""
-        self.__cursor.execute(sql)
-        outcome = self.__cursor.fetchall()
-        return [_name for _name, in outcome]
+        return sorted(self.__section_names)
 
     def has_section(self, section_name: str) -> bool:
-        section_names = self.select_section_names()
-        return section_name in section_names
+        return section_name in self.__section_names
 
     def create_section(self, section_name: str) -> None:
         if self.has_section(section_name):
             return None
 
         sql: str = f"""
-CREATE TABLE IF NOT EXISTS {section_name} (
-    key Text Not Null UNIQUE,
+CREATE TABLE IF NOT EXISTS {self.__quote(section_name)} (
+    key Text Not Null PRIMARY KEY,
     value Text Not Null
-)
+) WITHOUT ROWID
 """
-        self.__cursor.execute(sql)
-        self.__db.commit()
+        self.__db.execute(sql)
+        self.__section_names.add(section_name)
 
     def drop_section(self, section_name: str) -> None:
         if not self.has_section(section_name):
             return None
 
         sql: str = f"""
-        DROP TABLE {section_name}
+        DROP TABLE {self.__quote(section_name)}
 """
-        self.__cursor.execute(sql)
+        self.__db.execute(sql)
+        self.__section_names.discard(section_name)
+        if self.__cache is not None:
+            self.__cache.pop(section_name, None)
 
     def select_section(self, section_name: str = "") -> dict[str, str]:
-        if not section_name:
-            section_name = "Global"
+        section_name = section_name or "Global"
         if not self.has_section(section_name):
             return {}
 
         sql: str = f"""
-        SELECT key, value FROM {section_name}
+        SELECT key, value FROM {self.__quote(section_name)}
 """
-        self.__cursor.execute(sql)
-        outcome = self.__cursor.fetchall()
+        outcome = self.__db.execute(sql).fetchall()
         return {_key: _value for _key, _value in outcome}
 
     def has_key(self, key: str, section_name: str = "") -> bool:
-        if not self.has_section(section_name):
-            return False
-        section = self.select_section(section_name)
-        return key in section
+        return self.__get(key, section_name or "Global") is not None
 
     def select_key(self, key: str, section_name: str = "") -> str:
-        if not section_name:
-            section_name = "Global"
-        if not self.has_key(key, section_name):
-            return ""
-
-        sql: str = f"""
-        SELECT value FROM {section_name} WHERE key = "{key}"
-"""
-        self.__cursor.execute(sql)
-        outcome = self.__cursor.fetchall()
-        return outcome[0][0] if outcome else ""
+        value = self.__get(key, section_name or "Global")
+        return "" if value is None else value
 
     def insert_key(self, key: str, value: str, section_name: str = "") -> None:
-        if not section_name:
-            section_name = "Global"
-        if self.has_key(key, section_name):
+        """键不存在时插入"""
+        section_name = section_name or "Global"
+        if not self.has_section(section_name):
             return None
 
         sql: str = f"""
-        INSERT INTO {section_name} (key, value) VALUES ("{key}", "{value}")
+        INSERT OR IGNORE INTO {self.__quote(section_name)} (key, value) VALUES (?, ?)
 """
-        self.__cursor.execute(sql)
-        self.__db.commit()
+        cursor = self.__db.execute(sql, (key, value))
+        if cursor.rowcount:
+            self.__cache_set(section_name, key, value)
 
     def delete_key(self, key: str, section_name: str = "") -> None:
-        if not section_name:
-            section_name = "Global"
-        if not self.has_key(key, section_name):
+        section_name = section_name or "Global"
+        if not self.has_section(section_name):
             return None
 
         sql: str = f"""
-        DELETE FROM {section_name} WHERE key = "{key}"
+        DELETE FROM {self.__quote(section_name)} WHERE key = ?
 """
-        self.__cursor.execute(sql)
+        self.__db.execute(sql, (key,))
+        if self.__cache is not None:
+            self.__cache.get(section_name, {}).pop(key, None)
 
     def update_key(self, key: str, value: str, section_name: str = "") -> None:
-        if not section_name:
-            section_name = "Global"
-        if not self.has_key(key, section_name):
+        """键存在时更新"""
+        section_name = section_name or "Global"
+        if not self.has_section(section_name):
             return None
 
         sql: str = f"""
-        UPDATE {section_name} SET value = "{value}" WHERE key = "{key}"
+        UPDATE {self.__quote(section_name)} SET value = ? WHERE key = ?
 """
-        self.__cursor.execute(sql)
+        cursor = self.__db.execute(sql, (value, key))
+        if cursor.rowcount:
+            self.__cache_set(section_name, key, value)
+
+    def set_key(self, key: str, value: str, section_name: str = "") -> None:
+        """插入或更新, 分区不存在时自动创建"""
+        self.set_many({key: value}, section_name)
+
+    def set_many(self, items: dict[str, str] | Iterable[tuple[str, str]], section_name: str = "") -> None:
+        """在一个事务内批量插入或更新"""
+        section_name = section_name or "Global"
+        pairs: list[tuple[str, str]] = list(items.items() if isinstance(items, dict) else items)
+        with self.transaction():
+            self.create_section(section_name)
+            sql: str = f"""
+        INSERT INTO {self.__quote(section_name)} (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+            self.__db.executemany(sql, pairs)
+        for _key, _value in pairs:
+            self.__cache_set(section_name, _key, _value)
+
+    def get_many(self, keys: Iterable[str], section_name: str = "") -> dict[str, str]:
+        """批量读取, 不存在的键不出现在结果中"""
+        section_name = section_name or "Global"
+        keys = list(dict.fromkeys(keys))
+        if not self.has_section(section_name):
+            return {}
+
+        values: dict[str, str] = {}
+        missed_keys: list[str] = keys
+        if self.__cache is not None:
+            section_cache = self.__cache.get(section_name, {})
+            values = {_key: section_cache[_key] for _key in keys if _key in section_cache}
+            missed_keys = [_key for _key in keys if _key not in section_cache]
+
+        # SQLite 单条语句的参数个数有限, 分块查询
+        chunk_size: int = 500
+        for i in range(0, len(missed_keys), chunk_size):
+            chunk = missed_keys[i: i + chunk_size]
+            sql: str = f"""
+        SELECT key, value FROM {self.__quote(section_name)} WHERE key IN ({", ".join("?" * len(chunk))})
+"""
+            for _key, _value in self.__db.execute(sql, chunk):
+                values[_key] = _value
+                self.__cache_set(section_name, _key, _value)
+        return {_key: values[_key] for _key in keys if _key in values}
+
+    @contextmanager
+    def transaction(self):
+        """显式事务, 可嵌套; 最外层正常退出时提交, 异常时回滚"""
+        if self.__transaction_depth == 0:
+            self.__db.execute("BEGIN")
+        self.__transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__transaction_depth -= 1
+            if self.__transaction_depth == 0:
+                self.__db.execute("ROLLBACK")
+                # 回滚后缓存与分区列表可能失效
+                if self.__cache is not None:
+                    self.__cache.clear()
+                self.__section_names = set(self.__query_section_names())
+            raise
+        else:
+            self.__transaction_depth -= 1
+            if self.__transaction_depth == 0:
+                self.__db.execute("COMMIT")
 
     def is_section(self, section: str) -> bool:
         sql: str = f"""
-        PRAGMA table_info({section})
+        PRAGMA table_info({self.__quote(section)})
 """
-        self.__cursor.execute(sql)
-        outcome = self.__cursor.fetchall()
+        outcome = self.__db.execute(sql).fetchall()
         names = [_name for _, _name, *_ in outcome]
-        return names[0] == "key"
+        return bool(names) and names[0] == "key"
 
     def close(self) -> None:
         self.__db.close()
-        self.__cursor.close()
+
+    def __get(self, key: str, section_name: str) -> str | None:
+        if not self.has_section(section_name):
+            return None
+        if self.__cache is not None and key in self.__cache.get(section_name, {}):
+            return self.__cache[section_name][key]
+
+        sql: str = f"""
+        SELECT value FROM {self.__quote(section_name)} WHERE key = ?
+"""
+        outcome = self.__db.execute(sql, (key,)).fetchone()
+        if outcome is None:
+            return None
+        self.__cache_set(section_name, key, outcome[0])
+        return outcome[0]
+
+    def __cache_set(self, section_name: str, key: str, value: str) -> None:
+        if self.__cache is not None:
+            self.__cache.setdefault(section_name, {})[key] = value
+
+    def __query_section_names(self) -> list[str]:
+        sql: str = """
+        SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name
+"""
+        return [_name for _name, in self.__db.execute(sql).fetchall()]
+
+    @staticmethod
+    def __quote(section_name: str) -> str:
+        # 表名无法参数化, 以双引号转义
+        return '"' + section_name.replace('"', '""') + '"'
 
     def __str__(self) -> str:
         text_list: list[str] = []
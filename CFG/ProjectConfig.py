@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+
+from CFG.ConfigDB import ConfigDB
+
+
+class ProjectConfig(object):
+    """
+    工程配置: 每个工程的天线表与结果路径保存在 Project 分区 (键为工程绝对路径),
+    命名预设保存在 Preset 分区 (天线名称→频段), 可在不同工程之间共享
+    """
+    __PROJECT_SECTION: str = "Project"
+    __PRESET_SECTION: str = "Preset"
+
+    def __init__(self, db: ConfigDB):
+        self.__db = db
+        self.__db.create_section(self.__PROJECT_SECTION)
+        self.__db.create_section(self.__PRESET_SECTION)
+
+    @property
+    def db(self):
+        return self.__db
+
+    @staticmethod
+    def default_file() -> Path:
+        return Path.home() / ".autoeff.db"
+
+    def save_project(self, project: Path, antenna_table: list[tuple[str, str, str]], result_path: str,
+                     preset_name: str = "") -> None:
+        value = json.dumps({"antenna_table": [list(_row) for _row in antenna_table],
+                            "result_path": result_path, "preset": preset_name}, ensure_ascii=False)
+        self.__db.set_key(self.__project_key(project), value, self.__PROJECT_SECTION)
+
+    def load_project(self, project: Path) -> dict | None:
+        """返回 {"antenna_table": [(天线, 效率图, 频段)], "result_path": str, "preset": str}, 未保存过时返回 None"""
+        value = self.__db.select_key(self.__project_key(project), self.__PROJECT_SECTION)
+        if not value:
+            return None
+        try:
+            config: dict = json.loads(value)
+        except ValueError:
+            return None
+        return {"antenna_table": [tuple(_row) for _row in config.get("antenna_table", [])],
+                "result_path": config.get("result_path", ""), "preset": config.get("preset", "")}
+
+    def delete_project(self, project: Path) -> None:
+        self.__db.delete_key(self.__project_key(project), self.__PROJECT_SECTION)
+
+    def select_preset_names(self) -> list[str]:
+        return sorted(self.__db.select_section(self.__PRESET_SECTION))
+
+    def save_preset(self, preset_name: str, antenna_table: list[tuple[str, str, str]]) -> None:
+        freq_map: dict[str, str] = {_antenna_name: _freq_text for _antenna_name, _, _freq_text in antenna_table
+                                    if _freq_text}
+        self.__db.set_key(preset_name, json.dumps(freq_map, ensure_ascii=False), self.__PRESET_SECTION)
+
+    def load_preset(self, preset_name: str) -> dict[str, str]:
+        """天线名称→频段"""
+        value = self.__db.select_key(preset_name, self.__PRESET_SECTION)
+        try:
+            return json.loads(value) if value else {}
+        except ValueError:
+            return {}
+
+    def delete_preset(self, preset_name: str) -> None:
+        self.__db.delete_key(preset_name, self.__PRESET_SECTION)
+
+    @staticmethod
+    def apply_freq_map(antenna_table: list[tuple[str, str, str]],
+                       freq_map: dict[str, str]) -> list[tuple[str, str, str]]:
+        """按天线名称套用频段, 未出现在 freq_map 中的行保持不变"""
+        return [(_antenna_name, _graph_name, freq_map.get(_antenna_name, _freq_text))
+                for _antenna_name, _graph_name, _freq_text in antenna_table]
+
+    @staticmethod
+    def __project_key(project: Path) -> str:
+        return str(Path(project).resolve())
@@ -1 +1,2 @@
-from CFG.ConfigDB import ConfigDB
\ No newline at end of file
+from CFG.ConfigDB import ConfigDB
+from CFG.ProjectConfig import ProjectConfig
\ No newline at end of file
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from CST.FieldChart import FieldChart
+from CST.Graph import Graph
+from CST.LineChart import LineChart
+from TRC import Tracer
+
+
+class ChartCache(object):
+    __INDEX_NAME: str = "index.json"
+    __CHUNK_SIZE: int = 1024 * 1024
+    __FIELD_ARRAYS: tuple[str, ...] = ("data", "power")
+    # 进程内保持映射的文件数上限, 超出后按最近使用淘汰
+    __MEMO_SIZE: int = 256
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 512 * 1024 * 1024):
+        self.__cache_dir = Path(cache_dir)
+        self.__max_bytes = max_bytes
+        self.__dirty = False
+        self.__index: dict[str, dict] = self.__load_index()
+        # 进程内记住已映射的数组, 同一文件重复加载时返回同一组数组对象, 使按数组缓存的重采样结果可复用
+        self.__memo: OrderedDict[str, tuple[str, dict[str, np.ndarray]]] = OrderedDict()
+
+    @property
+    def cache_dir(self):
+        return self.__cache_dir
+
+    @property
+    def max_bytes(self):
+        return self.__max_bytes
+
+    @property
+    def total_bytes(self):
+        return sum(_entry["bytes"] for _entry in self.__index.values())
+
+    def load_line_chart(self, dir: Path, graph: Graph) -> LineChart:
+        sig_file: Path = dir / graph.files
+        arrays = self.get(sig_file)
+        if arrays is not None:
+            return LineChart(graph, arrays["x"], arrays["y"])
+        line_chart = LineChart.parse_sig_file(dir, graph)
+        self.put(sig_file, {"x": line_chart.x, "y": line_chart.y})
+        self.flush()
+        return line_chart
+
+    def load_field_chart(self, dir: Path, graph: Graph) -> FieldChart:
+        ffs_file: Path = dir / graph.files
+        arrays = self.get(ffs_file, self.__FIELD_ARRAYS)
+        if arrays is not None:
+            return FieldChart(graph, arrays["data"], float(arrays["power"][0]))
+        field_chart = FieldChart.parse_ffs_file(dir, graph)
+        self.put(ffs_file, {"data": field_chart.data, "power": np.array([field_chart.stimulated_power])})
+        self.flush()
+        return field_chart
+
+    def load_line_charts(self, dir: Path, graphs: list[Graph], executor: str = "thread",
+                         max_workers: int | None = None, progress: Callable[[int, int], None] | None = None,
+                         cancel_event: threading.Event | None = None) -> list[LineChart]:
+        return self.__load_charts(dir, graphs, LineChart.parse_sig_files, executor, max_workers,
+                                  progress, cancel_event, (),
+                                  lambda _chart: {"x": _chart.x, "y": _chart.y},
+                                  lambda _graph, _arrays: LineChart(_graph, _arrays["x"], _arrays["y"]))
+
+    def load_field_charts(self, dir: Path, graphs: list[Graph], executor: str = "thread",
+                          max_workers: int | None = None, progress: Callable[[int, int], None] | None = None,
+                          cancel_event: threading.Event | None = None) -> list[FieldChart]:
+        return self.__load_charts(dir, graphs, FieldChart.parse_ffs_files, executor, max_workers,
+                                  progress, cancel_event, self.__FIELD_ARRAYS,
+                                  lambda _chart: {"data": _chart.data, "power": np.array([_chart.stimulated_power])},
+                                  lambda _graph, _arrays: FieldChart(_graph, _arrays["data"],
+                                                                     float(_arrays["power"][0])))
+
+    def get(self, source: Path, names: tuple[str, ...] = ()) -> dict[str, np.ndarray] | None:
+        """names 为必须存在的数组名, 旧版本写入的条目缺少其中任一数组时按未命中处理"""
+        key = self.__key(source)
+        entry = self.__index.get(key)
+        if entry is None:
+            return None
+        if any(_name not in entry["arrays"] for _name in names):
+            self.__remove(key)
+            return None
+        if not Path(source).exists():
+            self.__remove(key)
+            return None
+
+        # 修改时间与大小未变则直接命中, 否则比对内容摘要
+        stat = os.stat(source)
+        if (entry["mtime_ns"], entry["size"]) != (stat.st_mtime_ns, stat.st_size):
+            if self.__digest(source) != entry["digest"]:
+                self.__remove(key)
+                return None
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+
+        memo = self.__memo.get(key)
+        if memo is not None and memo[0] == entry["digest"]:
+            arrays = memo[1]
+            self.__memo.move_to_end(key)
+        else:
+            arrays: dict[str, np.ndarray] = {}
+            try:
+                for _name, _file in entry["arrays"].items():
+                    arrays[_name] = np.load(self.__cache_dir / _file, mmap_mode="r")
+            except (OSError, ValueError):
+                self.__remove(key)
+                return None
+            self.__memo[key] = (entry["digest"], arrays)
+            while len(self.__memo) > self.__MEMO_SIZE:
+                self.__memo.popitem(last=False)
+        entry["atime"] = time.time()
+        self.__dirty = True
+        return arrays
+
+    def put(self, source: Path, arrays: dict[str, np.ndarray]) -> None:
+        self.__cache_dir.mkdir(parents=True, exist_ok=True)
+        key = self.__key(source)
+        stat = os.stat(source)
+        digest = self.__digest(source)
+        if key in self.__index:
+            self.__remove(key)
+
+        # 文件名包含摘要, 避免覆盖仍被映射的旧文件
+        files: dict[str, str] = {}
+        size: int = 0
+        for _name, _array in arrays.items():
+            file_name = f"{key}.{digest[:16]}.{_name}.npy"
+            temp_file = self.__cache_dir / f"{file_name}.tmp"
+            with open(temp_file, mode="wb") as f:
+                np.save(f, np.ascontiguousarray(_array))
+            os.replace(temp_file, self.__cache_dir / file_name)
+            files[_name] = file_name
+            size += (self.__cache_dir / file_name).stat().st_size
+
+        self.__index[key] = {
+            "source": str(Path(source).resolve()),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": digest,
+            "arrays": files,
+            "bytes": size,
+            "atime": time.time(),
+        }
+        # 只标记索引已修改, 由调用方在一批写入后统一 flush, 避免每次写入都重写整个索引
+        self.__evict(key)
+        self.__dirty = True
+
+    def clear(self) -> None:
+        for _key in list(self.__index):
+            self.__remove(_key)
+        self.flush()
+
+    def flush(self) -> None:
+        if not self.__dirty:
+            return None
+        self.__cache_dir.mkdir(parents=True, exist_ok=True)
+        index_file = self.__cache_dir / self.__INDEX_NAME
+        temp_file = self.__cache_dir / f"{self.__INDEX_NAME}.tmp"
+        with open(temp_file, mode="w", encoding="utf-8") as f:
+            json.dump(self.__index, f, ensure_ascii=False)
+        os.replace(temp_file, index_file)
+        self.__dirty = False
+
+    def __load_charts(self, dir: Path, graphs: list[Graph], parse_files, executor: str,
+                      max_workers: int | None, progress: Callable[[int, int], None] | None,
+                      cancel_event: threading.Event | None, names: tuple[str, ...], to_arrays,
+                      from_arrays) -> list:
+        """progress(已完成数, 总数) 在每张图就绪时调用"""
+        charts: list = []
+        missed_graphs: list[Graph] = []
+        for _graph in graphs:
+            arrays = self.get(dir / _graph.files, names)
+            if arrays is None:
+                charts.append(None)
+                missed_graphs.append(_graph)
+            else:
+                charts.append(from_arrays(_graph, arrays))
+
+        hit_count = len(graphs) - len(missed_graphs)
+        if progress is not None and hit_count:
+            progress(hit_count, len(graphs))
+
+        def on_parsed(count: int) -> None:
+            if progress is not None:
+                progress(hit_count + count, len(graphs))
+
+        # 未命中的文件并行解析, 写入缓存由当前进程完成
+        with Tracer.span("ChartCache.parse_missed", hits=hit_count, misses=len(missed_graphs)):
+            parsed_charts = iter(parse_files(dir, missed_graphs, executor, max_workers, on_parsed, cancel_event))
+        for i, _chart in enumerate(charts):
+            if _chart is None:
+                chart = next(parsed_charts)
+                self.put(dir / chart.graph.files, to_arrays(chart))
+                charts[i] = chart
+        self.flush()
+        return charts
+
+    def __load_index(self) -> dict[str, dict]:
+        index_file = self.__cache_dir / self.__INDEX_NAME
+        if not index_file.exists():
+            return {}
+        try:
+            with open(index_file, mode="r", encoding="utf-8") as f:
+                index: dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        # 清理不在索引中的残留文件 (例如映射期间无法删除的旧条目)
+        known_files: set[str] = {self.__INDEX_NAME}
+        for _entry in index.values():
+            known_files.update(_entry["arrays"].values())
+        for _file in self.__cache_dir.iterdir():
+            if _file.name not in known_files:
+                self.__unlink(_file)
+        return index
+
+    def __evict(self, keep_key: str) -> None:
+        # 按最近访问时间淘汰, 直到总大小不超过上限
+        total_bytes = self.total_bytes
+        keys = sorted(self.__index, key=lambda _key: self.__index[_key]["atime"])
+        for _key in keys:
+            if total_bytes <= self.__max_bytes:
+                break
+            if _key == keep_key:
+                continue
+            total_bytes -= self.__index[_key]["bytes"]
+            self.__remove(_key)
+
+    def __remove(self, key: str) -> None:
+        self.__memo.pop(key, None)
+        entry = self.__index.pop(key, None)
+        if entry is None:
+            return None
+        for _file in entry["arrays"].values():
+            self.__unlink(self.__cache_dir / _file)
+        self.__dirty = True
+
+    @staticmethod
+    def __unlink(file: Path) -> None:
+        # Windows 下被内存映射的文件无法删除, 留待下次清理
+        try:
+            file.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __key(source: Path) -> str:
+        path_text = str(Path(source).resolve())
+        return hashlib.sha1(path_text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def __digest(cls, source: Path) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(source, mode="rb") as f:
+            while chunk := f.read(cls.__CHUNK_SIZE):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
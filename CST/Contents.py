@@ -1,5 +1,8 @@
 from pathlib import Path
 
+from CST.ChartCache import ChartCache
+from CST.ResultCatalogue import ResultCatalogue
+
 
 class Contents(object):
     def __init__(self, path: str | Path):
@@ -8,6 +11,8 @@ class Contents(object):
         if not Path(path).exists():
             raise FileNotFoundError()
         self.__project = Path(path)
+        self.__chart_cache: ChartCache | None = None
+        self.__catalogue: ResultCatalogue | None = None
 
     @property
     def name(self):
@@ -41,10 +46,26 @@ class Contents(object):
     def model_res(self):
         return self.result_dir / "Model.res"
 
+    @property
+    def catalogue(self) -> ResultCatalogue:
+        if self.__catalogue is None:
+            self.__catalogue = ResultCatalogue(self.model_res)
+        return self.__catalogue
+
     @property
     def cache_dir(self):
         return self.project_dir / "Cache"
 
+    @property
+    def chart_cache_dir(self):
+        return self.cache_dir / "AutoEff"
+
+    @property
+    def chart_cache(self) -> ChartCache:
+        if self.__chart_cache is None:
+            self.__chart_cache = ChartCache(self.chart_cache_dir)
+        return self.__chart_cache
+
     @property
     def ds_result_dir(self):
         return self.result_dir /  "DS"
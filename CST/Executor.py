@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import CancelledError, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from CST.Graph import Graph
+
+
+def map_graphs(function: Callable, dir: Path, graphs: list[Graph], executor: str = "thread",
+               max_workers: int | None = None, progress: Callable[[int], None] | None = None,
+               cancel_event: threading.Event | None = None) -> list:
+    """
+    在线程池或进程池上执行 function(dir, graph), 结果顺序与 graphs 一致
+    每完成一项调用 progress(已完成数); cancel_event 被置位时取消剩余任务并抛出 CancelledError
+    """
+    results: list = []
+    if len(graphs) <= 1 or max_workers == 1:
+        for _graph in graphs:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CancelledError()
+            results.append(function(dir, _graph))
+            if progress is not None:
+                progress(len(results))
+        return results
+
+    pool: Executor
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == "process":
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        raise ValueError(executor)
+    with pool:
+        futures = [pool.submit(function, dir, _graph) for _graph in graphs]
+        for _future in futures:
+            if cancel_event is not None and cancel_event.is_set():
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise CancelledError()
+            results.append(_future.result())
+            if progress is not None:
+                progress(len(results))
+    return results
@@ -1,24 +1,148 @@
+import re
+import threading
 from pathlib import Path
+from typing import Callable
 
 import numpy as np
 
+from CST.Executor import map_graphs
 from CST.Graph import Graph
+from TRC import Tracer
 
 class FieldChart(object):
-    def __init__(self, graph: Graph, data: list[list[float]]):
+    # 列顺序: Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)
+    PHI: int = 0
+    THETA: int = 1
+    RE_E_THETA: int = 2
+    IM_E_THETA: int = 3
+    RE_E_PHI: int = 4
+    IM_E_PHI: int = 5
+    # 自由空间波阻抗 (Ω)
+    Z0: float = 376.730313668
+    # 文件头没有给出激励功率时使用 CST 的默认值 (W)
+    DEFAULT_STIMULATED_POWER: float = 0.5
+
+    def __init__(self, graph: Graph, data: np.ndarray, stimulated_power: float = np.nan):
+        """data 形状为 (列数, 行数), 每一列在内存中连续; stimulated_power 为文件头中的激励功率, 缺少时为 NaN"""
         self.__graph = graph
-        self.__data = []
-        if data:
-            for _ in range(len(data[0])):
-                self.__data.append([])
-            for _line in data:
-                for i, __num in enumerate(_line):
-                    self.__data[i].append(__num)
+        self.__data = data
+        self.__stimulated_power = float(stimulated_power)
+        self.__block_size: int | None = None
 
     @property
     def graph(self):
         return self.__graph
 
+    @property
+    def data(self) -> np.ndarray:
+        return self.__data
+
+    @property
+    def stimulated_power(self) -> float:
+        return self.__stimulated_power
+
+    @property
+    def phi(self) -> np.ndarray:
+        return self.__data[self.PHI]
+
+    @property
+    def theta(self) -> np.ndarray:
+        return self.__data[self.THETA]
+
+    @property
+    def e_theta(self) -> np.ndarray:
+        return self.__to_complex(self.RE_E_THETA, self.IM_E_THETA)
+
+    @property
+    def e_phi(self) -> np.ndarray:
+        return self.__to_complex(self.RE_E_PHI, self.IM_E_PHI)
+
+    @property
+    def block_size(self) -> int:
+        """单个频率包含的 (phi, theta) 采样点数"""
+        if self.__block_size is None:
+            phi, theta = self.phi, self.theta
+            if phi.size == 0:
+                self.__block_size = 0
+            else:
+                starts = np.flatnonzero((phi == phi[0]) & (theta == theta[0]))
+                self.__block_size = int(starts[1]) if starts.size > 1 else phi.size
+        return self.__block_size
+
+    @property
+    def frequency_count(self) -> int:
+        return self.__data.shape[1] // self.block_size if self.block_size else 0
+
+    def frequency_slice(self, index: int) -> "FieldChart":
+        """第 index 个频率的数据视图, 不复制数据"""
+        if not 0 <= index < self.frequency_count:
+            raise IndexError(index)
+        start = index * self.block_size
+        return FieldChart(self.__graph, self.__data[:, start: start + self.block_size],
+                          self.__stimulated_power)
+
+    def iter_frequency_slices(self):
+        for i in range(self.frequency_count):
+            yield self.frequency_slice(i)
+
+    @property
+    def frequencies(self) -> list[float]:
+        """从结果名称 (如 "farfield (f=2.45) [1]") 中提取的频率, 单位 GHz"""
+        return [float(_value) for _value in re.findall(r"f=\s*(\d+\.?\d*)", self.__graph.name)]
+
+    def solid_angle_weights(self) -> np.ndarray:
+        """单个频率块内每个采样点的立体角权重 sin(theta)·dtheta·dphi (sr), 按梯形积分计算"""
+        block = self.frequency_slice(0) if self.frequency_count > 1 else self
+        theta = np.deg2rad(block.theta)
+        phi = np.deg2rad(block.phi)
+        theta_values, theta_indices = np.unique(theta, return_inverse=True)
+        phi_values, phi_indices = np.unique(phi, return_inverse=True)
+        theta_widths = self.__trapezoid_widths(theta_values, periodic=False)
+        phi_widths = self.__trapezoid_widths(phi_values, periodic=True)
+        return np.sin(theta) * theta_widths[theta_indices] * phi_widths[phi_indices]
+
+    def radiation_intensity(self) -> np.ndarray:
+        """辐射强度 U = (|E_theta|^2 + |E_phi|^2) / (2·Z0), 形状为 (频率数, 块大小)"""
+        power = (np.square(self.__data[self.RE_E_THETA]) + np.square(self.__data[self.IM_E_THETA]) +
+                 np.square(self.__data[self.RE_E_PHI]) + np.square(self.__data[self.IM_E_PHI]))
+        return (power / (2.0 * self.Z0)).reshape(self.frequency_count, self.block_size)
+
+    def total_radiated_power(self) -> np.ndarray:
+        """每个频率的总辐射功率 (W)"""
+        return self.radiation_intensity() @ self.solid_angle_weights()
+
+    def directivity(self) -> np.ndarray:
+        """方向性系数 (线性), 形状为 (频率数, 块大小)"""
+        intensity = self.radiation_intensity()
+        trp = intensity @ self.solid_angle_weights()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 4.0 * np.pi * intensity / trp[:, np.newaxis]
+
+    def gain(self, power: float | np.ndarray) -> np.ndarray:
+        """以 power (W) 为参考的增益 (线性); 传入激励功率即为实际增益, 传入接收功率即为 IEEE 增益"""
+        power = np.broadcast_to(np.asarray(power, dtype=np.float64), (self.frequency_count,))
+        return 4.0 * np.pi * self.radiation_intensity() / power[:, np.newaxis]
+
+    def __trapezoid_widths(self, values: np.ndarray, periodic: bool) -> np.ndarray:
+        if values.size < 2:
+            return np.full(values.size, 2.0 * np.pi if periodic else np.pi)
+        steps = np.diff(values)
+        step = float(steps.mean())
+        # phi 覆盖一整周且不含重复端点时按周期处理, 每个点的宽度为相邻间隔的平均
+        if periodic and np.isclose(values[-1] - values[0] + step, 2.0 * np.pi):
+            return (np.append(steps, step) + np.insert(steps, 0, step)) / 2.0
+        widths = np.empty(values.size)
+        widths[0] = steps[0] / 2.0
+        widths[-1] = steps[-1] / 2.0
+        widths[1:-1] = (values[2:] - values[:-2]) / 2.0
+        return widths
+
+    def __to_complex(self, real_column: int, imag_column: int) -> np.ndarray:
+        values = np.empty(self.__data.shape[1], dtype=np.complex128)
+        values.real = self.__data[real_column]
+        values.imag = self.__data[imag_column]
+        return values
+
     @staticmethod
     def parse_ffs_file(dir: Path, graph: Graph):
         ffs_file : Path = dir / graph.files
@@ -27,20 +151,17 @@ class FieldChart(object):
         if not ffs_file.exists():
             raise FileNotFoundError()
 
-        # 读取文件，转化为字符串列表
-        lines: list[str]
-        with open(ffs_file) as f:
-            lines = f.readlines()
-
-        # 去除文件头
-        index: int = 4
-        body_lines = lines[index : ]
-
-        data: list[list[float]] = []
-        for _line in body_lines:
-            words = _line.strip().split(" ")
-            nums: list[float] = []
-            for __word in words:
-                nums.append(float(__word))
-            data.append(nums)
-        return FieldChart(graph, data)
\ No newline at end of file
+        # 文件头中取激励功率 (如 "// Stimulated Power = 0.5"), 其后一次性读入数值矩阵并转为按列存储
+        with Tracer.span("FieldChart.parse_ffs_file", ffs_file):
+            with open(ffs_file, mode="r", encoding="latin1") as f:
+                header = "".join(f.readline() for _ in range(4))
+                data: np.ndarray = np.loadtxt(f, dtype=np.float64, comments=None, ndmin=2)
+        match = re.search(r"Stimulated\s+Power[^\d\n]*?([-+]?\d+\.?\d*(?:[eE][-+]?\d+)?)", header, re.IGNORECASE)
+        return FieldChart(graph, np.ascontiguousarray(data.T), float(match[1]) if match else np.nan)
+
+    @staticmethod
+    def parse_ffs_files(dir: Path, graphs: list[Graph], executor: str = "thread",
+                        max_workers: int | None = None, progress: Callable[[int], None] | None = None,
+                        cancel_event: threading.Event | None = None) -> list["FieldChart"]:
+        """并行解析多个 .ffs 文件, 结果顺序与 graphs 一致"""
+        return map_graphs(FieldChart.parse_ffs_file, dir, graphs, executor, max_workers, progress, cancel_event)
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+from TRC import Tracer
+
 
 class Graph(object):
     def __init__(self, lines: list[str]):
@@ -66,12 +68,19 @@ class Graph(object):
         return self.__files
 
     @staticmethod
-    def extract_graph(model_res_path: Path, treepath: str = ""):
+    def parse_model_res(model_res_path: Path) -> list["Graph"]:
         if model_res_path.suffix != ".res":
             raise RuntimeError()
         if not model_res_path.exists():
             raise FileNotFoundError()
 
+        with Tracer.span("Graph.parse_model_res", model_res_path) as span:
+            all_graphs = Graph.__parse_model_res(model_res_path)
+            span.set(graphs=len(all_graphs))
+        return all_graphs
+
+    @staticmethod
+    def __parse_model_res(model_res_path: Path) -> list["Graph"]:
         # 读取文件，转化为字符串列表
         lines: list[str]
         with open(model_res_path) as f:
@@ -100,10 +109,16 @@ class Graph(object):
                 graph_lines.append(_line.strip())
         if len(all_graphs) != graph_num:
             raise IOError
+        return all_graphs
 
-        graphs: list[Graph] = []
-        if treepath:
-            for _graph in all_graphs:
-                if treepath in _graph.treepath:
-                    graphs.append(_graph)
-        return graphs
+    @staticmethod
+    def extract_graph(model_res_path: Path, treepath: str = ""):
+        with Tracer.span("Graph.extract_graph", treepath=treepath):
+            all_graphs = Graph.parse_model_res(model_res_path)
+
+            graphs: list[Graph] = []
+            if treepath:
+                for _graph in all_graphs:
+                    if treepath in _graph.treepath:
+                        graphs.append(_graph)
+            return graphs
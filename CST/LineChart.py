@@ -1,8 +1,13 @@
+import threading
 from pathlib import Path
+from typing import Callable
 
 import numpy as np
 
+from CST import Resample
+from CST.Executor import map_graphs
 from CST.Graph import Graph
+from TRC import Tracer
 
 
 class LineChart(object):
@@ -23,6 +28,30 @@ class LineChart(object):
     def y(self):
         return self.__y
 
+    def interpolate(self, points: np.ndarray, method: str = "linear") -> np.ndarray:
+        """在任意频点上插值 (linear/cubic), 超出频率范围的点为 NaN"""
+        return Resample.interpolate(self.__x, self.__y, points, method)
+
+    def resample(self, grid: np.ndarray, method: str = "linear") -> "LineChart":
+        grid = np.asarray(grid, dtype=np.float64)
+        return LineChart(self.__graph, grid, Resample.resample_matrix([self.__x], [self.__y], grid, method)[0])
+
+    @staticmethod
+    def common_grid(charts: list["LineChart"], step: float | None = None) -> np.ndarray:
+        """多条曲线的公共频率网格, 见 Resample.common_grid"""
+        return Resample.common_grid([_chart.x for _chart in charts], step)
+
+    @staticmethod
+    def resample_charts(charts: list["LineChart"], grid: np.ndarray | None = None,
+                        method: str = "linear") -> tuple[np.ndarray, np.ndarray]:
+        """
+        把多条曲线重采样到同一网格, 返回 (网格, (曲线数, len(网格)) 的矩阵)
+        grid 为空时使用 common_grid; 结果按曲线缓存, 重复比较同一批曲线时直接复用
+        """
+        grid = LineChart.common_grid(charts) if grid is None else np.asarray(grid, dtype=np.float64)
+        return grid, Resample.resample_matrix([_chart.x for _chart in charts], [_chart.y for _chart in charts],
+                                              grid, method)
+
     @staticmethod
     def parse_sig_file(dir: Path, graph: Graph):
         sig_file: Path = dir / graph.files
@@ -31,28 +60,25 @@ class LineChart(object):
         if not sig_file.exists():
             raise FileNotFoundError()
 
-        # 读取文件，转化为字符串列表
-        lines: list[str]
-        with open(sig_file) as f:
-            lines = f.readlines()
-
-        # 去除文件头
-        index: int = 4
-        body_lines = lines[index:]
-
-        data: list[list[float]] = []
-        for _line in body_lines:
-            words = _line.strip().split(" ")
-            nums: list[float] = []
-            for __word in words:
-                nums.append(float(__word))
-            data.append(nums)
-
-        x = np.array([_row[0] for _row in data])
-        if len(data[0]) == 2:
-            y = np.array([_row[1] for _row in data])
-        elif len(data[0]) == 3:
-            y = np.array([complex(_row[1], _row[2]) for _row in data])
+        # 跳过文件头, 一次性读入数值矩阵 (兼容连续空格与制表符)
+        with Tracer.span("LineChart.parse_sig_file", sig_file):
+            data: np.ndarray = np.loadtxt(sig_file, dtype=np.float64, comments=None, skiprows=4,
+                                          ndmin=2, encoding="latin1")
+
+        x = data[:, 0].copy()
+        if data.shape[1] == 2:
+            y = data[:, 1].copy()
+        elif data.shape[1] == 3:
+            y = np.empty(data.shape[0], dtype=np.complex128)
+            y.real = data[:, 1]
+            y.imag = data[:, 2]
         else:
-            raise
+            raise RuntimeError()
         return LineChart(graph, x, y)
+
+    @staticmethod
+    def parse_sig_files(dir: Path, graphs: list[Graph], executor: str = "thread",
+                        max_workers: int | None = None, progress: Callable[[int], None] | None = None,
+                        cancel_event: threading.Event | None = None) -> list["LineChart"]:
+        """并行解析多个 .sig 文件, 结果顺序与 graphs 一致"""
+        return map_graphs(LineChart.parse_sig_file, dir, graphs, executor, max_workers, progress, cancel_event)
@@ -0,0 +1,134 @@
+import threading
+import weakref
+
+import numpy as np
+
+# 重采样结果缓存: 以原始 y 数组的 id 为键, 数组被回收时自动清除
+_cache_lock = threading.Lock()
+_resample_cache: dict[int, dict[tuple, np.ndarray]] = {}
+
+
+def interp_linear(x: np.ndarray, y: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    沿最后一维做线性插值, y 形状为 (..., len(x)), 支持复数; 超出 x 范围的点为 NaN
+    """
+    x, y, points = np.asarray(x), np.asarray(y), np.asarray(points, dtype=np.float64)
+    indices, t = _locate(x, points)
+    y0 = y[..., indices]
+    values = y0 + (y[..., indices + 1] - y0) * t
+    return _mask_outside(values, x, points)
+
+
+def interp_cubic(x: np.ndarray, y: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    沿最后一维做三次 Hermite 插值, 节点斜率取非均匀三点差分, 端点取单侧差分;
+    y 形状为 (..., len(x)), 支持复数; 超出 x 范围的点为 NaN
+    """
+    x, y, points = np.asarray(x), np.asarray(y), np.asarray(points, dtype=np.float64)
+    if x.size < 3:
+        return interp_linear(x, y, points)
+    steps = np.diff(x)
+    secants = np.diff(y, axis=-1) / steps
+    slopes = np.empty(y.shape, dtype=np.result_type(secants, np.float64))
+    slopes[..., 0] = secants[..., 0]
+    slopes[..., -1] = secants[..., -1]
+    slopes[..., 1:-1] = ((steps[1:] * secants[..., :-1] + steps[:-1] * secants[..., 1:]) /
+                         (steps[:-1] + steps[1:]))
+
+    indices, t = _locate(x, points)
+    h = steps[indices]
+    t2 = t * t
+    t3 = t2 * t
+    values = ((2.0 * t3 - 3.0 * t2 + 1.0) * y[..., indices] + (t3 - 2.0 * t2 + t) * h * slopes[..., indices] +
+              (-2.0 * t3 + 3.0 * t2) * y[..., indices + 1] + (t3 - t2) * h * slopes[..., indices + 1])
+    return _mask_outside(values, x, points)
+
+
+def interpolate(x: np.ndarray, y: np.ndarray, points: np.ndarray, method: str = "linear") -> np.ndarray:
+    if method == "linear":
+        return interp_linear(x, y, points)
+    elif method == "cubic":
+        return interp_cubic(x, y, points)
+    raise ValueError(method)
+
+
+def common_grid(xs: list[np.ndarray], step: float | None = None) -> np.ndarray:
+    """
+    多条曲线频率范围的交集; step 为空时取交集内采样点最多的原始网格, 否则按 step 等间距生成
+    """
+    if not xs:
+        return np.empty(0)
+    inf = max(float(np.min(_x)) for _x in xs)
+    sup = min(float(np.max(_x)) for _x in xs)
+    if inf > sup:
+        raise ValueError("频率范围没有交集")
+    if step is not None:
+        return np.linspace(inf, sup, int(round((sup - inf) / step)) + 1)
+    grids = [np.asarray(_x)[(inf <= _x) & (_x <= sup)] for _x in xs]
+    return max(grids, key=len)
+
+
+def resample_matrix(xs: list[np.ndarray], ys: list[np.ndarray], grid: np.ndarray,
+                    method: str = "linear") -> np.ndarray:
+    """
+    把多条曲线重采样到同一网格, 返回 (曲线数, len(grid)) 的矩阵
+    频率网格相同的曲线合并为一次向量化插值; 结果按 (y 数组, 原始频率 x, 网格, 方法) 缓存
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    is_complex = any(np.iscomplexobj(_y) for _y in ys)
+    matrix = np.empty((len(ys), grid.size), dtype=np.complex128 if is_complex else np.float64)
+    grid_key = (grid.size, hash(grid.tobytes()), method)
+
+    # 同一 y 数组可能配以不同的 x 传入, 键中包含 x; 未命中的曲线按频率网格分组
+    missed_groups: dict[tuple, list[int]] = {}
+    for i, (_x, _y) in enumerate(zip(xs, ys)):
+        x_key = (len(_x), hash(np.asarray(_x).tobytes()))
+        row = _get_cached(_y, (x_key, grid_key))
+        if row is not None:
+            matrix[i] = row
+            continue
+        missed_groups.setdefault(x_key, []).append(i)
+
+    for _x_key, _indices in missed_groups.items():
+        x = np.asarray(xs[_indices[0]])
+        rows = interpolate(x, np.stack([np.asarray(ys[_i]) for _i in _indices]), grid, method)
+        for __i, __row in zip(_indices, rows):
+            matrix[__i] = __row
+            _put_cached(ys[__i], (_x_key, grid_key), __row)
+    return matrix
+
+
+def _locate(x: np.ndarray, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # 每个插值点所在的区间 [x[i], x[i + 1]] 及其相对位置
+    if x.size < 2:
+        raise ValueError("插值至少需要两个采样点")
+    indices = np.clip(np.searchsorted(x, points, side="right") - 1, 0, x.size - 2)
+    t = (points - x[indices]) / (x[indices + 1] - x[indices])
+    return indices, t
+
+
+def _mask_outside(values: np.ndarray, x: np.ndarray, points: np.ndarray) -> np.ndarray:
+    outside = (points < x[0]) | (points > x[-1])
+    if outside.any():
+        values = np.array(values, dtype=np.result_type(values, np.float64))
+        values[..., outside] = np.nan
+    return values
+
+
+def _get_cached(y: np.ndarray, key: tuple) -> np.ndarray | None:
+    with _cache_lock:
+        return _resample_cache.get(id(y), {}).get(key)
+
+
+def _put_cached(y: np.ndarray, key: tuple, row: np.ndarray) -> None:
+    with _cache_lock:
+        entry = _resample_cache.get(id(y))
+        if entry is None:
+            entry = _resample_cache[id(y)] = {}
+            weakref.finalize(y, _drop_cached, id(y))
+        entry[key] = row
+
+
+def _drop_cached(y_id: int) -> None:
+    with _cache_lock:
+        _resample_cache.pop(y_id, None)
@@ -0,0 +1,108 @@
+import os
+from bisect import bisect_left
+from pathlib import Path
+
+from CST.Graph import Graph
+
+
+class ResultCatalogue(object):
+    __NGRAM: int = 3
+
+    def __init__(self, model_res: Path):
+        self.__model_res = Path(model_res)
+        self.__signature: tuple[int, int] | None = None
+        self.__graphs: list[Graph] = []
+        self.__treepath_index: dict[str, list[int]] = {}
+        self.__name_index: dict[str, list[int]] = {}
+        self.__type_index: dict[str, list[int]] = {}
+        self.__suffix_index: dict[str, list[int]] = {}
+        self.__sorted_treepaths: list[str] = []
+        self.__ngram_index: dict[str, set[int]] = {}
+
+    @property
+    def model_res(self):
+        return self.__model_res
+
+    @property
+    def graphs(self) -> list[Graph]:
+        self.refresh()
+        return list(self.__graphs)
+
+    def refresh(self) -> bool:
+        """Model.res 发生变化时重建索引, 返回是否重建"""
+        stat = os.stat(self.__model_res)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.__signature:
+            return False
+        self.__build(Graph.parse_model_res(self.__model_res))
+        self.__signature = signature
+        return True
+
+    def find_by_treepath(self, treepath: str) -> list[Graph]:
+        self.refresh()
+        return self.__select(self.__treepath_index.get(treepath, []))
+
+    def find_by_name(self, name: str) -> list[Graph]:
+        self.refresh()
+        return self.__select(self.__name_index.get(name, []))
+
+    def find_by_type(self, type: str) -> list[Graph]:
+        self.refresh()
+        return self.__select(self.__type_index.get(type, []))
+
+    def find_by_suffix(self, suffix: str) -> list[Graph]:
+        self.refresh()
+        return self.__select(self.__suffix_index.get(suffix, []))
+
+    def startswith(self, prefix: str) -> list[Graph]:
+        """按 treepath 前缀查询"""
+        self.refresh()
+        lower = bisect_left(self.__sorted_treepaths, prefix)
+        upper = bisect_left(self.__sorted_treepaths, prefix + chr(0x10FFFF))
+        indices: list[int] = []
+        for _treepath in self.__sorted_treepaths[lower: upper]:
+            indices.extend(self.__treepath_index[_treepath])
+        return self.__select(sorted(indices))
+
+    def search(self, text: str) -> list[Graph]:
+        """按 treepath 子串查询, 结果保持 Model.res 中的顺序"""
+        self.refresh()
+        if not text:
+            return list(self.__graphs)
+        if len(text) < self.__NGRAM:
+            # 过短的子串无法使用 n-gram 索引
+            candidates = range(len(self.__graphs))
+        else:
+            ngram_sets = []
+            for i in range(len(text) - self.__NGRAM + 1):
+                ngram_set = self.__ngram_index.get(text[i: i + self.__NGRAM])
+                if not ngram_set:
+                    return []
+                ngram_sets.append(ngram_set)
+            ngram_sets.sort(key=len)
+            candidates = sorted(set.intersection(*ngram_sets))
+        return [self.__graphs[_i] for _i in candidates if text in self.__graphs[_i].treepath]
+
+    def __build(self, graphs: list[Graph]) -> None:
+        self.__graphs = graphs
+        self.__treepath_index = {}
+        self.__name_index = {}
+        self.__type_index = {}
+        self.__suffix_index = {}
+        self.__ngram_index = {}
+        for i, _graph in enumerate(graphs):
+            self.__treepath_index.setdefault(_graph.treepath, []).append(i)
+            self.__name_index.setdefault(_graph.name, []).append(i)
+            self.__type_index.setdefault(_graph.type, []).append(i)
+            self.__suffix_index.setdefault(Path(_graph.files).suffix, []).append(i)
+            treepath = _graph.treepath
+            for j in range(len(treepath) - self.__NGRAM + 1):
+                self.__ngram_index.setdefault(treepath[j: j + self.__NGRAM], set()).add(i)
+        self.__sorted_treepaths = sorted(self.__treepath_index)
+
+    def __select(self, indices: list[int]) -> list[Graph]:
+        return [self.__graphs[_i] for _i in indices]
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.__graphs)
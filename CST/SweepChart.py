@@ -0,0 +1,85 @@
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from CST.Graph import Graph
+from CST.LineChart import LineChart
+
+
+class SweepChart(object):
+    def __init__(self, graphs: list[Graph], x: np.ndarray, y: np.ndarray):
+        """同一结果 (treepath) 的全部参数扫描运行; y 形状为 (运行数, 频点数), 共享频率网格 x"""
+        self.__graphs = graphs
+        self.__x = x
+        self.__y = y
+
+    @property
+    def graphs(self):
+        return self.__graphs
+
+    @property
+    def treepath(self):
+        return self.__graphs[0].treepath if self.__graphs else ""
+
+    @property
+    def name(self):
+        return self.__graphs[0].name if self.__graphs else ""
+
+    @property
+    def x(self):
+        return self.__x
+
+    @property
+    def y(self):
+        return self.__y
+
+    @property
+    def run_count(self) -> int:
+        return self.__y.shape[0]
+
+    @property
+    def run_labels(self) -> list[str]:
+        """
+        各运行的唯一标签: 参数取值, 没有参数信息时为运行序号;
+        同一结果内参数取值重复的运行附加序号 (如 "P #2"), 避免不同运行被当作同一列
+        """
+        counts = Counter(_graph.parametric for _graph in self.__graphs)
+        return [(_graph.parametric if counts[_graph.parametric] == 1 else f"{_graph.parametric} #{i}")
+                if _graph.parametric else str(i) for i, _graph in enumerate(self.__graphs)]
+
+    def run(self, index: int) -> LineChart:
+        return LineChart(self.__graphs[index], self.__x, self.__y[index])
+
+    @staticmethod
+    def group_graphs(graphs: list[Graph]) -> dict[str, list[Graph]]:
+        """按 treepath 分组, 同一 treepath 的多个图即为参数扫描的各次运行, 保持原顺序"""
+        groups: dict[str, list[Graph]] = {}
+        for _graph in graphs:
+            groups.setdefault(_graph.treepath, []).append(_graph)
+        return groups
+
+    @staticmethod
+    def from_line_charts(charts: list[LineChart]) -> "SweepChart":
+        """
+        把多条曲线合并到同一频率网格上; 网格全部相同时直接堆叠,
+        否则取各曲线频率范围的交集, 以其中采样点最多的网格为公共网格做线性插值
+        """
+        if not charts:
+            return SweepChart([], np.empty(0), np.empty((0, 0)))
+        graphs = [_chart.graph for _chart in charts]
+        x = np.asarray(charts[0].x)
+        if all(np.array_equal(_chart.x, x) for _chart in charts[1:]):
+            return SweepChart(graphs, x, np.stack([np.asarray(_chart.y) for _chart in charts]))
+        x, y = LineChart.resample_charts(charts)
+        return SweepChart(graphs, x, y)
+
+    @staticmethod
+    def parse_sweep(dir: Path, graphs: list[Graph], executor: str = "thread", max_workers: int | None = None,
+                    progress: Callable[[int], None] | None = None,
+                    cancel_event: threading.Event | None = None) -> "SweepChart":
+        """并行解析一组运行的 .sig 文件并合并"""
+        charts = LineChart.parse_sig_files(dir, graphs, executor, max_workers, progress, cancel_event)
+        return SweepChart.from_line_charts(charts)
@@ -1,4 +1,7 @@
+from .ChartCache import *
 from .Contents import *
 from .FieldChart import *
 from .Graph import *
-from .LineChart import *
\ No newline at end of file
+from .LineChart import *
+from .ResultCatalogue import *
+from .SweepChart import *
\ No newline at end of file
@@ -0,0 +1,36 @@
+import csv
+from pathlib import Path
+
+from .TableWriter import TableWriter
+
+
+class CsvWriter(TableWriter):
+    SUFFIX: str = ".csv"
+    APPEND_FILE: bool = True
+
+    def __init__(self, file: Path, chunk_size: int = 65536):
+        super().__init__(file, chunk_size)
+        self.__stream = None
+        self.__writer = None
+
+    def _is_dataset(self) -> bool:
+        # CSV 可直接追加到同一文件
+        return self.file.is_dir()
+
+    def _open(self, file: Path) -> None:
+        is_new = not file.exists() or file.stat().st_size == 0
+        self.__stream = open(file, mode="a", newline="", encoding="utf-8")
+        self.__writer = csv.writer(self.__stream)
+        if is_new:
+            self.__writer.writerow(self.COLUMNS)
+
+    def _write_chunk(self, columns: dict[str, list]) -> None:
+        # 无效值写为空字段
+        for _name in self.COLUMNS:
+            if _name not in self.STRING_COLUMNS:
+                columns[_name] = [self.to_nullable(_value) for _value in columns[_name]]
+        self.__writer.writerows(zip(*(columns[_name] for _name in self.COLUMNS)))
+        self.__stream.flush()
+
+    def _close(self) -> None:
+        self.__stream.close()
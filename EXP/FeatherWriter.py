@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from .ParquetWriter import arrow_schema, arrow_table
+from .TableWriter import TableWriter
+
+
+class FeatherWriter(TableWriter):
+    SUFFIX: str = ".feather"
+
+    def __init__(self, file: Path, chunk_size: int = 65536):
+        super().__init__(file, chunk_size)
+        self.__sink = None
+        self.__writer = None
+
+    def _open(self, file: Path) -> None:
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("导出 Feather 需要安装 pyarrow") from e
+        # Feather V2 即 Arrow IPC 文件格式, 每个块写成一个 record batch
+        self.__sink = pa.OSFile(str(file), "wb")
+        self.__writer = pa.ipc.new_file(self.__sink, arrow_schema(self))
+
+    def _write_chunk(self, columns: dict[str, list]) -> None:
+        self.__writer.write_table(arrow_table(self, columns))
+
+    def _close(self) -> None:
+        self.__writer.close()
+        self.__sink.close()
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from .TableWriter import TableWriter
+
+
+class ParquetWriter(TableWriter):
+    SUFFIX: str = ".parquet"
+
+    def __init__(self, file: Path, chunk_size: int = 65536):
+        super().__init__(file, chunk_size)
+        self.__writer = None
+
+    def _open(self, file: Path) -> None:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("导出 Parquet 需要安装 pyarrow") from e
+        self.__writer = pq.ParquetWriter(file, arrow_schema(self))
+
+    def _write_chunk(self, columns: dict[str, list]) -> None:
+        # 每个块写成一个 row group
+        self.__writer.write_table(arrow_table(self, columns))
+
+    def _close(self) -> None:
+        self.__writer.close()
+
+
+def arrow_schema(writer: TableWriter):
+    import pyarrow as pa
+    return pa.schema([(_name, pa.string() if _name in writer.STRING_COLUMNS else pa.float64())
+                      for _name in writer.COLUMNS])
+
+
+def arrow_table(writer: TableWriter, columns: dict[str, list]):
+    import pyarrow as pa
+    arrays = []
+    for _name in writer.COLUMNS:
+        if _name in writer.STRING_COLUMNS:
+            arrays.append(pa.array(columns[_name], type=pa.string()))
+        else:
+            arrays.append(pa.array([writer.to_nullable(_value) for _value in columns[_name]], type=pa.float64()))
+    return pa.Table.from_arrays(arrays, schema=arrow_schema(writer))
@@ -0,0 +1,95 @@
+import math
+import os
+import time
+from pathlib import Path
+from typing import Iterable
+
+
+class TableWriter(object):
+    """
+    长格式统计表写入器基类, 按块缓冲后写出
+    带后缀的单文件只有 APPEND_FILE 为 True 的格式 (CSV) 能跨运行追加, 其余格式的已有文件会被拒绝,
+    需要追加时使用数据集目录
+    """
+    COLUMNS: tuple[str, ...] = ("project", "antenna", "band", "f_lo", "f_hi", "first", "max", "last", "mean")
+    STRING_COLUMNS: tuple[str, ...] = ("project", "antenna", "band")
+    SUFFIX: str = ""
+    APPEND_FILE: bool = False
+
+    def __init__(self, file: Path, chunk_size: int = 65536):
+        self.__file = Path(file)
+        self.__chunk_size = chunk_size
+        self.__rows: list[tuple] = []
+        self.__row_count: int = 0
+        self.__opened = False
+        self.__closed = False
+
+    @property
+    def file(self):
+        return self.__file
+
+    @property
+    def row_count(self):
+        return self.__row_count
+
+    def write_rows(self, rows: Iterable[tuple]) -> None:
+        if self.__closed:
+            raise RuntimeError()
+        for _row in rows:
+            self.__rows.append(_row)
+            if len(self.__rows) >= self.__chunk_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self.__rows:
+            return None
+        if not self.__opened:
+            self._open(self.__resolve_file())
+            self.__opened = True
+        columns: dict[str, list] = {_name: [] for _name in self.COLUMNS}
+        for _row in self.__rows:
+            for __name, __value in zip(self.COLUMNS, _row):
+                columns[__name].append(__value)
+        self._write_chunk(columns)
+        self.__row_count += len(self.__rows)
+        self.__rows = []
+
+    def close(self) -> None:
+        if self.__closed:
+            return None
+        self.flush()
+        if self.__opened:
+            self._close()
+        self.__closed = True
+
+    def _open(self, file: Path) -> None:
+        raise NotImplementedError()
+
+    def _write_chunk(self, columns: dict[str, list]) -> None:
+        raise NotImplementedError()
+
+    def _close(self) -> None:
+        raise NotImplementedError()
+
+    def _is_dataset(self) -> bool:
+        # 没有后缀或已存在的目录视为数据集目录, 每次运行追加一个分片文件
+        return self.__file.is_dir() or not self.__file.suffix
+
+    def __resolve_file(self) -> Path:
+        if not self._is_dataset():
+            if self.__file.exists() and not self.APPEND_FILE:
+                raise FileExistsError(f"{self.__file} 已存在, {self.SUFFIX} 单文件无法追加, 请改用无后缀的数据集目录")
+            self.__file.parent.mkdir(parents=True, exist_ok=True)
+            return self.__file
+        self.__file.mkdir(parents=True, exist_ok=True)
+        return self.__file / f"part-{time.strftime("%Y%m%d_%H%M%S")}-{os.getpid()}-{id(self):x}{self.SUFFIX}"
+
+    @staticmethod
+    def to_nullable(value: float) -> float | None:
+        return None if value is None or math.isnan(value) else value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
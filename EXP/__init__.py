@@ -0,0 +1,4 @@
+from .CsvWriter import CsvWriter
+from .FeatherWriter import FeatherWriter
+from .ParquetWriter import ParquetWriter
+from .TableWriter import TableWriter
\ No newline at end of file
@@ -1,76 +1,984 @@
+import re
+import threading
+from concurrent.futures import CancelledError
 from pathlib import Path
+from typing import Callable
 from datetime import datetime
 
-from openpyxl.workbook import Workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.styles import Alignment, Border, Side, Font
-from openpyxl.utils import get_column_letter
 import numpy as np
 
-from frequency import Frequency, FrequencyBand, FrequencyManager
+from Frequency import Frequency, FrequencyBand, FrequencyManager
+from EXP import TableWriter
+from TRC import Tracer
 import CST
 
-def cal_antenna_eff_map(cst: CST.Contents, antenna_table: list[tuple[str, str, str]]) -> dict[
+def extract_antennas(cst: CST.Contents) -> list[tuple[str, str]]:
+    """按效率图名称中的 [ACn] 端口标记提取 (天线名称, 效率图名称); 参数扫描的多次运行只取一次"""
+    antennas: list[tuple[str, str]] = []
+    for _graph in cst.catalogue.search("System Tot. Efficiency"):
+        if match := re.search(r"\[AC(\d+)]", _graph.name):
+            antennas.append((f"Ant{match[1]}", _graph.name))
+    return list(dict.fromkeys(antennas))
+
+
+BAND_STATS_DTYPE = np.dtype([("first", np.float64), ("max", np.float64), ("last", np.float64),
+                             ("mean", np.float64), ("min", np.float64)])
+
+
+def get_band_bounds(freq: Frequency | FrequencyBand) -> tuple[float, float]:
+    """频率或频段的上下限, 单位 GHz; 双工频段取下行"""
+    if type(freq) == Frequency:
+        return freq.inf / 1000.0, freq.sup / 1000.0
+    elif type(freq) == FrequencyBand:
+        if freq.is_duplex():
+            return freq.downlink.inf / 1000.0, freq.downlink.sup / 1000.0
+        else:
+            return freq.link.inf / 1000.0, freq.link.sup / 1000.0
+    return 0.0, 0.0
+
+
+def parse_band_bounds(freq_text: str) -> tuple[list[str], list[Frequency | FrequencyBand], np.ndarray]:
+    """拆分逗号分隔的频率文本, 返回各项文本、解析结果与 (频段数, 2) 的上下限数组 (GHz)"""
+    freq_texts: list[str] = [item.strip() for item in freq_text.split(",") if item.strip()]
+    freqs = [FrequencyManager.parse_freq_text(_freq_text)[0] for _freq_text in freq_texts]
+    bounds = np.array([get_band_bounds(_freq) for _freq in freqs], dtype=np.float64).reshape(-1, 2)
+    return freq_texts, freqs, bounds
+
+
+def cal_band_stats(chart: CST.LineChart, band_infs: np.ndarray, band_sups: np.ndarray,
+                   scale: str = "linear") -> np.ndarray:
+    """
+    一次性计算多个频段的 first/max/last/mean/min
+    超出曲线频率范围的频段各字段为 NaN; scale 为 "db" 时返回 10*log10 的结果
+    """
+    y: np.ndarray = np.real(chart.y)
+    return cal_band_stats_matrix(chart.x, y[np.newaxis, :], band_infs, band_sups, scale)[0]
+
+
+def cal_band_stats_matrix(x: np.ndarray, y: np.ndarray, band_infs: np.ndarray, band_sups: np.ndarray,
+                          scale: str = "linear") -> np.ndarray:
+    """共享频率网格 x 的多条曲线 y (曲线数, 频点数) 在多个频段上的统计, 形状为 (曲线数, 频段数)"""
+    x = np.asarray(x)
+    y = np.real(np.asarray(y))
+    band_infs = np.asarray(band_infs, dtype=np.float64)
+    band_sups = np.asarray(band_sups, dtype=np.float64)
+
+    stats = np.full((y.shape[0], band_infs.size), np.nan, dtype=BAND_STATS_DTYPE)
+    x_min, x_max = x.min(), x.max()
+    # 上下限颠倒的频段 (如 "2000~1000 MHz") 与超出曲线范围的频段一样无效
+    is_valid = ((x_min <= band_infs) & (band_infs < x_max) & (x_min < band_sups) & (band_sups <= x_max) &
+                (band_infs <= band_sups))
+    if is_valid.any():
+        infs = band_infs[is_valid]
+        sups = band_sups[is_valid]
+        inf_indices = np.searchsorted(x, infs)
+        sup_indices = np.searchsorted(x, sups)
+        inf_indices -= (x[inf_indices] != infs)
+
+        # 区间 [inf, sup] 交错排列, 沿频率轴 reduceat 取偶数位即为各频段的归约结果
+        # 末尾补一列, 使 sup + 1 不越界
+        padded_y = np.pad(y, ((0, 0), (0, 1)))
+        bounds = np.empty(inf_indices.size * 2, dtype=np.intp)
+        bounds[0::2] = inf_indices
+        bounds[1::2] = sup_indices + 1
+
+        valid_stats = stats[:, is_valid]
+        valid_stats["first"] = y[:, inf_indices]
+        valid_stats["max"] = np.maximum.reduceat(padded_y, bounds, axis=1)[:, 0::2]
+        valid_stats["last"] = y[:, sup_indices]
+        valid_stats["mean"] = np.add.reduceat(padded_y, bounds, axis=1)[:, 0::2] / (sup_indices - inf_indices + 1)
+        valid_stats["min"] = np.minimum.reduceat(padded_y, bounds, axis=1)[:, 0::2]
+        stats[:, is_valid] = valid_stats
+
+    if scale == "db":
+        for _field in BAND_STATS_DTYPE.names:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                stats[_field] = 10.0 * np.log10(stats[_field])
+    elif scale != "linear":
+        raise ValueError(scale)
+    return stats
+
+
+def cal_band_stats_map(charts: list[CST.LineChart], band_infs: np.ndarray, band_sups: np.ndarray,
+                       scale: str = "linear") -> np.ndarray:
+    """多条曲线 × 多个频段的统计结果, 形状为 (曲线数, 频段数)"""
+    stats = np.empty((len(charts), len(band_infs)), dtype=BAND_STATS_DTYPE)
+    for i, _chart in enumerate(charts):
+        stats[i] = cal_band_stats(_chart, band_infs, band_sups, scale)
+    return stats
+
+
+def cal_band_stats_exact(chart: CST.LineChart, band_infs: np.ndarray, band_sups: np.ndarray,
+                         method: str = "linear", scale: str = "linear") -> np.ndarray:
+    """
+    与 cal_band_stats 相同, 但频段边界不对齐到采样点: first/last 为边界处的插值,
+    max/min 包含边界插值与频段内部的采样点, mean 为 [inf, sup] 上的梯形积分除以带宽
+    """
+    y: np.ndarray = np.real(chart.y)
+    return cal_band_stats_exact_matrix(chart.x, y[np.newaxis, :], band_infs, band_sups, method, scale)[0]
+
+
+def cal_band_stats_exact_matrix(x: np.ndarray, y: np.ndarray, band_infs: np.ndarray, band_sups: np.ndarray,
+                                method: str = "linear", scale: str = "linear") -> np.ndarray:
+    """共享频率网格 x 的多条曲线 y (曲线数, 频点数) 在多个频段上的精确边界统计, 形状为 (曲线数, 频段数)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.real(np.asarray(y))
+    band_infs = np.asarray(band_infs, dtype=np.float64)
+    band_sups = np.asarray(band_sups, dtype=np.float64)
+
+    stats = np.full((y.shape[0], band_infs.size), np.nan, dtype=BAND_STATS_DTYPE)
+    is_valid = (x[0] <= band_infs) & (band_infs <= band_sups) & (band_sups <= x[-1])
+    if is_valid.any() and x.size >= 2:
+        infs = band_infs[is_valid]
+        sups = band_sups[is_valid]
+        inf_values = CST.Resample.interpolate(x, y, infs, method)
+        sup_values = CST.Resample.interpolate(x, y, sups, method)
+
+        # 频段内部 (不含边界) 的采样点为 [starts, stops)
+        starts = np.searchsorted(x, infs, side="right")
+        stops = np.searchsorted(x, sups, side="left")
+        has_interior = starts < stops
+        padded_y = np.pad(y, ((0, 0), (0, 1)))
+        bounds = np.empty(starts.size * 2, dtype=np.intp)
+        bounds[0::2] = starts
+        bounds[1::2] = np.maximum(stops, starts)
+        interior_max = np.where(has_interior, np.maximum.reduceat(padded_y, bounds, axis=1)[:, 0::2], -np.inf)
+        interior_min = np.where(has_interior, np.minimum.reduceat(padded_y, bounds, axis=1)[:, 0::2], np.inf)
+
+        # 梯形积分: 左边界段 + 内部采样点之间 (累积和相减) + 右边界段; 无内部点时直接连接两个边界
+        cumulative = np.zeros_like(y)
+        cumulative[:, 1:] = np.cumsum(np.diff(x) * (y[:, 1:] + y[:, :-1]) / 2.0, axis=1)
+        first = np.minimum(starts, x.size - 1)
+        last = np.maximum(stops - 1, 0)
+        integral = np.where(
+            has_interior,
+            (x[first] - infs) * (inf_values + y[:, first]) / 2.0 + cumulative[:, last] - cumulative[:, first] +
+            (sups - x[last]) * (y[:, last] + sup_values) / 2.0,
+            (sups - infs) * (inf_values + sup_values) / 2.0)
+        widths = sups - infs
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = np.where(widths > 0, integral / widths, inf_values)
+
+        valid_stats = stats[:, is_valid]
+        valid_stats["first"] = inf_values
+        valid_stats["max"] = np.maximum(np.maximum(inf_values, sup_values), interior_max)
+        valid_stats["last"] = sup_values
+        valid_stats["mean"] = means
+        valid_stats["min"] = np.minimum(np.minimum(inf_values, sup_values), interior_min)
+        stats[:, is_valid] = valid_stats
+
+    if scale == "db":
+        for _field in BAND_STATS_DTYPE.names:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                stats[_field] = 10.0 * np.log10(stats[_field])
+    elif scale != "linear":
+        raise ValueError(scale)
+    return stats
+
+
+def load_eff_chart_map(cst: CST.Contents, antenna_table: list[tuple[str, str, str]],
+                       executor: str = "thread", max_workers: int | None = None,
+                       progress: Callable[[int, int], None] | None = None,
+                       cancel_event: threading.Event | None = None) -> dict[str, CST.LineChart]:
+    # 只提取天线表中实际引用的效率图
+    graph_names: set[str] = {_graph_name for _, _graph_name, _freq_text in antenna_table if _freq_text}
+    eff_graphs: list[CST.Graph] = [_graph for _graph in cst.catalogue.search("System Tot. Efficiency")
+                                   if _graph.name in graph_names]
+    with Tracer.span("load_eff_chart_map", graphs=len(eff_graphs)):
+        eff_charts: list[CST.LineChart] = cst.chart_cache.load_line_charts(cst.result_dir, eff_graphs, executor,
+                                                                           max_workers, progress, cancel_event)
+    eff_chart_map: dict[str, CST.LineChart] = {_chart.graph.name: _chart for _chart in eff_charts}
+    return eff_chart_map
+
+
+def cal_freq_eff_items(eff_chart: CST.LineChart, freq_text: str) -> list[tuple[str, tuple[float]]]:
+    """
+    逐项计算频率文本中各频段的效率 (first, max, last, avg), 与拆分后的各项一一对应
+    超出范围的频段以原文本为键, 值为 -1
+    """
+    with Tracer.span("cal_band_stats", graph=eff_chart.graph.name) as span:
+        freq_texts, freqs, bounds = parse_band_bounds(freq_text)
+        band_stats = cal_band_stats(eff_chart, bounds[:, 0], bounds[:, 1])
+        span.set(bands=len(freq_texts))
+
+    freq_eff_items: list[tuple[str, tuple[float]]] = []
+    for _freq_text, _freq, _stats in zip(freq_texts, freqs, band_stats):
+        if np.isnan(_stats["first"]):
+            freq_eff_items.append((_freq_text, (-1, -1, -1, -1)))
+            continue
+        effs = (float(_stats["first"]), float(_stats["max"]), float(_stats["last"]), float(_stats["mean"]))
+        freq_eff_items.append((_freq.name, effs))
+    return freq_eff_items
+
+
+def cal_freq_eff_map(eff_chart: CST.LineChart, freq_text: str) -> dict[str, tuple[float]]:
+    """单行天线的各频段效率"""
+    return dict(cal_freq_eff_items(eff_chart, freq_text))
+
+
+def cal_antenna_eff_map(cst: CST.Contents, antenna_table: list[tuple[str, str, str]],
+                        executor: str = "thread", max_workers: int | None = None,
+                        progress: Callable[[int, int], None] | None = None,
+                        cancel_event: threading.Event | None = None) -> dict[
     str, dict[str, tuple[float]]]:
-    # 提取效率图
-    eff_graphs: list[CST.Graph] = CST.Graph.extract_graph(cst.model_res, "System Tot. Efficiency")
-    eff_charts: list[CST.LineChart] = []
-    for _graph in eff_graphs:
-        line_chart = CST.LineChart.parse_sig_file(cst.result_dir, _graph)
-        eff_charts.append(line_chart)
+    """progress(已加载端口数, 端口总数) 在每个端口的效率图就绪时调用; cancel_event 置位时抛出 CancelledError"""
+    eff_chart_map = load_eff_chart_map(cst, antenna_table, executor, max_workers, progress, cancel_event)
 
     antenna_eff_map: dict[str, dict[str, tuple[float]]] = {}
     for _antenna_name, _graph_name, _freq_text in antenna_table:
         if not _freq_text:
             continue
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+
+        freq_eff_map = cal_freq_eff_map(eff_chart_map[_graph_name], _freq_text)
+        antenna_eff_map |= {_antenna_name: freq_eff_map}
+    return antenna_eff_map
+
+
+class EffSession(object):
+    """
+    会话级结果模型: 记录每个 (效率图, 频率项) 的统计值与 .sig 文件签名
+    再次计算时只重算选择发生变化或 .sig 文件发生变化的行, 其余直接复用
+    """
+
+    def __init__(self, cst: CST.Contents):
+        self.__cst = cst
+        self.__lock = threading.Lock()
+        self.__signatures: dict[str, tuple[str, int, int]] = {}
+        self.__item_cache: dict[tuple[str, str], tuple[str, tuple[float]]] = {}
+        self.__antenna_eff_map: dict[str, dict[str, tuple[float]]] = {}
 
-        eff_chart: CST.LineChart
-        for __chart in eff_charts:
-            if __chart.graph.name == _graph_name:
-                eff_chart = __chart
-                break
+    @property
+    def cst(self):
+        return self.__cst
 
-        freq_eff_map: dict[str, tuple[float]] = {}
-        freq_texts: list[str] = [item.strip() for item in _freq_text.split(",")]
-        for __freq_text in freq_texts:
-            if not  __freq_text:
+    @property
+    def antenna_eff_map(self) -> dict[str, dict[str, tuple[float]]]:
+        """最近一次计算的结果"""
+        return self.__antenna_eff_map
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            self.__signatures.clear()
+            self.__item_cache.clear()
+
+    def get_stale_rows(self, antenna_table: list[tuple[str, str, str]]) -> list[int]:
+        """需要重算的行号"""
+        with self.__lock:
+            self.__drop_changed_graphs(antenna_table)
+            return self.__find_stale_rows(antenna_table)
+
+    def compute(self, antenna_table: list[tuple[str, str, str]], executor: str = "thread",
+                max_workers: int | None = None, progress: Callable[[int, int], None] | None = None,
+                cancel_event: threading.Event | None = None) -> dict[str, dict[str, tuple[float]]]:
+        with self.__lock:
+            self.__drop_changed_graphs(antenna_table)
+            stale_rows = self.__find_stale_rows(antenna_table)
+
+            # 只加载需要重算的行所引用的效率图
+            stale_table = [antenna_table[_row] for _row in stale_rows]
+            eff_chart_map = load_eff_chart_map(self.__cst, stale_table, executor, max_workers, progress,
+                                               cancel_event)
+            for _antenna_name, _graph_name, _freq_text in stale_table:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise CancelledError()
+                missed_texts = [__item for __item in dict.fromkeys(self.__split(_freq_text))
+                                if (_graph_name, __item) not in self.__item_cache]
+                freq_eff_items = cal_freq_eff_items(eff_chart_map[_graph_name], ", ".join(missed_texts))
+                for __item, __freq_eff_item in zip(missed_texts, freq_eff_items):
+                    self.__item_cache[(_graph_name, __item)] = __freq_eff_item
+
+            antenna_eff_map: dict[str, dict[str, tuple[float]]] = {}
+            for _antenna_name, _graph_name, _freq_text in antenna_table:
+                if not _freq_text:
+                    continue
+                freq_eff_map: dict[str, tuple[float]] = {}
+                for __item in self.__split(_freq_text):
+                    key, effs = self.__item_cache[(_graph_name, __item)]
+                    freq_eff_map |= {key: effs}
+                antenna_eff_map |= {_antenna_name: freq_eff_map}
+            self.__antenna_eff_map = antenna_eff_map
+            return antenna_eff_map
+
+    def __find_stale_rows(self, antenna_table: list[tuple[str, str, str]]) -> list[int]:
+        stale_rows: list[int] = []
+        for i, (_, _graph_name, _freq_text) in enumerate(antenna_table):
+            if any((_graph_name, __item) not in self.__item_cache for __item in self.__split(_freq_text)):
+                stale_rows.append(i)
+        return stale_rows
+
+    def __drop_changed_graphs(self, antenna_table: list[tuple[str, str, str]]) -> None:
+        # .sig 文件签名变化时丢弃该效率图的全部缓存
+        graph_names: set[str] = {_graph_name for _, _graph_name, _freq_text in antenna_table if _freq_text}
+        for _graph in self.__cst.catalogue.search("System Tot. Efficiency"):
+            if _graph.name not in graph_names:
                 continue
-            freq = FrequencyManager.parse_freq_text(__freq_text)[0]
-            freq_inf: float = 0
-            freq_sup: float = 0
-            if type(freq) == Frequency:
-                freq_inf = freq.inf / 1000.0
-                freq_sup = freq.sup / 1000.0
-            elif type(freq) == FrequencyBand:
-                if freq.is_duplex():
-                    freq_inf = freq.downlink.inf / 1000.0
-                    freq_sup = freq.downlink.sup / 1000.0
-                else:
-                    freq_inf = freq.link.inf / 1000.0
-                    freq_sup = freq.link.sup / 1000.0
-
-            is_valid_inf: bool = eff_chart.x.min() <= freq_inf < eff_chart.x.max()
-            is_valid_sup: bool = eff_chart.x.min() < freq_sup <= eff_chart.x.max()
-            if not is_valid_inf or not is_valid_sup:
-                freq_eff_map |= {__freq_text: (-1, -1, -1, -1)}
+            sig_file = self.__cst.result_dir / _graph.files
+            stat = sig_file.stat() if sig_file.exists() else None
+            signature = (_graph.files, stat.st_mtime_ns, stat.st_size) if stat else (_graph.files, 0, 0)
+            if self.__signatures.get(_graph.name) != signature:
+                self.__item_cache = {_key: _value for _key, _value in self.__item_cache.items()
+                                     if _key[0] != _graph.name}
+                self.__signatures[_graph.name] = signature
+
+    @staticmethod
+    def __split(freq_text: str) -> list[str]:
+        return [item.strip() for item in freq_text.split(",") if item.strip()]
+
+
+def cal_antenna_field_map(cst: CST.Contents, antenna_table: list[tuple[str, str, str]],
+                          stimulated_power: float | None = None, executor: str = "thread",
+                          max_workers: int | None = None) -> dict[str, dict[str, dict[str, tuple[float]]]]:
+    """
+    由远场 (.ffs) 计算各频段的总效率 TRP/P_stim (含失配损耗, 不是辐射效率)、峰值实际增益 (dBi), 并与 System Tot. Efficiency 交叉校验
+    远场与效率图按名称末尾的端口标记 (如 [AC1]) 对应, 远场频率取自结果名称中的 f=...
+    P_stim 取自各 .ffs 的文件头 (缺少时为 CST 默认的 0.5 W), stimulated_power 不为 None 时统一使用该值
+    远场频点稀疏, 每个指标只统计落在频段内的远场频点 (first, max, last, mean), 不在频点之间插值; 无效值为 NaN
+    """
+    antenna_tags: dict[str, str] = {}
+    for _antenna_name, _graph_name, _freq_text in antenna_table:
+        if _freq_text and (tag := _get_port_tag(_graph_name)):
+            antenna_tags[_antenna_name] = tag
+    field_graphs: list[CST.Graph] = [_graph for _graph in cst.catalogue.find_by_suffix(".ffs")
+                                     if _get_port_tag(_graph.name) in antenna_tags.values()]
+    field_charts: list[CST.FieldChart] = cst.chart_cache.load_field_charts(cst.result_dir, field_graphs,
+                                                                           executor, max_workers)
+    eff_chart_map = load_eff_chart_map(cst, antenna_table, executor, max_workers)
+
+    antenna_field_map: dict[str, dict[str, dict[str, tuple[float]]]] = {}
+    for _antenna_name, _graph_name, _freq_text in antenna_table:
+        if _antenna_name not in antenna_tags:
+            continue
+
+        # 汇总该端口所有远场的频率、TRP 与峰值增益
+        freqs: list[float] = []
+        trp_effs: list[float] = []
+        peak_gains: list[float] = []
+        for __chart in field_charts:
+            if _get_port_tag(__chart.graph.name) != antenna_tags[_antenna_name]:
+                continue
+            if len(__chart.frequencies) != __chart.frequency_count:
                 continue
+            power = stimulated_power
+            if power is None:
+                power = (__chart.stimulated_power if np.isfinite(__chart.stimulated_power)
+                         else CST.FieldChart.DEFAULT_STIMULATED_POWER)
+            freqs.extend(__chart.frequencies)
+            trp_effs.extend(__chart.total_radiated_power() / power)
+            peak_gains.extend(__chart.gain(power).max(axis=1))
+        if not freqs:
+            continue
 
-            inf_index = np.searchsorted(eff_chart.x, freq_inf)
-            sup_index = np.searchsorted(eff_chart.x, freq_sup)
-            if freq_inf != eff_chart.x[inf_index]:
-                inf_index = inf_index - 1
+        order = np.argsort(freqs, kind="stable")
+        x = np.asarray(freqs, dtype=np.float64)[order]
+        trp_eff = np.asarray(trp_effs, dtype=np.float64)[order]
+        with np.errstate(divide="ignore"):
+            peak_gain = 10.0 * np.log10(np.asarray(peak_gains, dtype=np.float64)[order])
+        # 效率曲线是连续扫频, 在远场频点处插值即可
+        eff_chart = eff_chart_map[_graph_name]
+        sys_eff = np.interp(x, eff_chart.x, np.real(eff_chart.y), left=np.nan, right=np.nan)
+        metric_values: dict[str, np.ndarray] = {
+            "trp_eff": trp_eff,
+            "sys_eff": sys_eff,
+            "eff_delta": trp_eff - sys_eff,
+            "peak_gain": peak_gain,
+        }
 
-            sub_eff = np.real(eff_chart.y[inf_index: sup_index + 1])
-            first_eff = float(sub_eff[0])
-            max_eff = float(sub_eff.max())
-            last_eff = float(sub_eff[-1])
-            avg_eff = float(sub_eff.mean())
-            freq_eff_map |= {freq.name: (first_eff, max_eff, last_eff, avg_eff)}
+        freq_texts, _, bounds = parse_band_bounds(_freq_text)
+        freq_field_map: dict[str, dict[str, tuple[float]]] = {__freq_text: {} for __freq_text in freq_texts}
+        for __metric, __values in metric_values.items():
+            band_stats = _cal_band_sample_stats(x, __values, bounds[:, 0], bounds[:, 1])
+            for ___freq_text, ___stats in zip(freq_texts, band_stats):
+                freq_field_map[___freq_text][__metric] = (float(___stats["first"]), float(___stats["max"]),
+                                                          float(___stats["last"]), float(___stats["mean"]))
+        antenna_field_map |= {_antenna_name: freq_field_map}
+    return antenna_field_map
+
+
+def _cal_band_sample_stats(x: np.ndarray, y: np.ndarray, band_infs: np.ndarray,
+                           band_sups: np.ndarray) -> np.ndarray:
+    """
+    只用落在 [inf, sup] 内的离散频点统计多个频段, 单个频点即可给出结果; 频段内没有频点时各字段为 NaN
+    容差吸收 MHz→GHz 换算的舍入误差
+    """
+    stats = np.full(band_infs.size, np.nan, dtype=BAND_STATS_DTYPE)
+    in_band = (x >= band_infs[:, np.newaxis] - 1e-9) & (x <= band_sups[:, np.newaxis] + 1e-9)
+    for i, _in_band in enumerate(in_band):
+        if _in_band.any():
+            values = y[_in_band]
+            stats[i] = (values[0], values.max(), values[-1], values.mean(), values.min())
+    return stats
+
+
+def _get_port_tag(name: str) -> str:
+    # 结果名称末尾的端口标记, 如 "System Tot. Efficiency [AC1]" 中的 "AC1"
+    match = re.search(r"\[([^\[\]]+)]\s*$", name)
+    return match[1] if match else ""
+
+
+S11_STATS_DTYPE = np.dtype([("max_db", np.float64), ("mean_db", np.float64), ("max_vswr", np.float64),
+                            ("bandwidth", np.float64), ("coverage", np.float64)])
+
+
+def extract_s_param_graphs(cst: CST.Contents) -> dict[tuple[int, int], CST.Graph]:
+    """按 Si,j (多模为 Si(m),j(n)) 名称提取 S 参数图: {(i, j): 图}; 参数扫描的多次运行只取第一次"""
+    s_param_graphs: dict[tuple[int, int], CST.Graph] = {}
+    for _graph in cst.catalogue.startswith("1D Results\\S-Parameters\\"):
+        if match := re.fullmatch(r"S(\d+)(?:\(\d+\))?,(\d+)(?:\(\d+\))?", _graph.name.strip()):
+            s_param_graphs.setdefault((int(match[1]), int(match[2])), _graph)
+    return s_param_graphs
+
+
+def cal_s11_stats_matrix(x: np.ndarray, s: np.ndarray, band_infs: np.ndarray, band_sups: np.ndarray,
+                         threshold_db: float = -6.0) -> np.ndarray:
+    """
+    共享频率网格 x 的多条反射系数曲线 s (曲线数, 频点数) 在多个频段上的 |S11| dB、VSWR 与匹配带宽
+    s 为复数或线性幅度; max_db/mean_db 与 max_vswr 复用 cal_band_stats_matrix,
+    bandwidth 为频段内 |S11| 低于 threshold_db 的频率宽度 (GHz, 阈值穿越点按线性插值), coverage 为其占带宽的比例
+    """
+    x = np.asarray(x, dtype=np.float64)
+    magnitude = np.abs(np.asarray(s))
+    band_infs = np.asarray(band_infs, dtype=np.float64)
+    band_sups = np.asarray(band_sups, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s_db = 20.0 * np.log10(magnitude)
+        vswr = np.where(magnitude < 1.0, (1.0 + magnitude) / (1.0 - magnitude), np.inf)
+
+    stats = np.full((magnitude.shape[0], band_infs.size), np.nan, dtype=S11_STATS_DTYPE)
+    db_stats = cal_band_stats_matrix(x, s_db, band_infs, band_sups)
+    stats["max_db"] = db_stats["max"]
+    stats["mean_db"] = db_stats["mean"]
+    stats["max_vswr"] = cal_band_stats_matrix(x, vswr, band_infs, band_sups)["max"]
+
+    # 每个采样区间内低于阈值的长度, 累积后按频段上下限所在的采样点相减
+    db0 = s_db[:, :-1]
+    db1 = s_db[:, 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fractions = np.where((db0 <= threshold_db) & (db1 <= threshold_db), 1.0,
+                             np.where(db0 <= threshold_db, (threshold_db - db0) / (db1 - db0),
+                                      np.where(db1 <= threshold_db, (threshold_db - db1) / (db0 - db1), 0.0)))
+    matched = np.zeros_like(s_db)
+    matched[:, 1:] = np.cumsum(np.nan_to_num(np.clip(fractions, 0.0, 1.0)) * np.diff(x), axis=1)
+
+    x_min, x_max = x.min(), x.max()
+    is_valid = ((x_min <= band_infs) & (band_infs < x_max) & (x_min < band_sups) & (band_sups <= x_max) &
+                (band_infs <= band_sups))
+    if is_valid.any():
+        infs = band_infs[is_valid]
+        sups = band_sups[is_valid]
+        inf_indices = np.searchsorted(x, infs)
+        sup_indices = np.searchsorted(x, sups)
+        inf_indices -= (x[inf_indices] != infs)
+        widths = x[sup_indices] - x[inf_indices]
+        bandwidths = matched[:, sup_indices] - matched[:, inf_indices]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverages = np.where(widths > 0, bandwidths / widths, s_db[:, inf_indices] <= threshold_db)
+
+        valid_stats = stats[:, is_valid]
+        valid_stats["bandwidth"] = bandwidths
+        valid_stats["coverage"] = coverages
+        stats[:, is_valid] = valid_stats
+    return stats
+
+
+def cal_antenna_s11_map(cst: CST.Contents, antenna_table: list[tuple[str, str, str]], threshold_db: float = -6.0,
+                        executor: str = "thread", max_workers: int | None = None,
+                        progress: Callable[[int, int], None] | None = None,
+                        cancel_event: threading.Event | None = None) -> dict[str, dict[str, tuple[float]]]:
+    """
+    各天线端口的反射系数 Sn,n 在所选频段上的 (max_db, mean_db, max_vswr, bandwidth, coverage), 无效值为 NaN
+    端口按效率图名称中的 [ACn] 标记对应; 频率网格相同的端口与所有频段合并为一次批量计算
+    """
+    s_param_graphs = extract_s_param_graphs(cst)
+    rows: list[tuple[str, CST.Graph, str]] = []
+    for _antenna_name, _graph_name, _freq_text in antenna_table:
+        match = re.fullmatch(r"AC(\d+)", _get_port_tag(_graph_name))
+        if _freq_text and match and (int(match[1]), int(match[1])) in s_param_graphs:
+            rows.append((_antenna_name, s_param_graphs[(int(match[1]), int(match[1]))], _freq_text))
+    charts = cst.chart_cache.load_line_charts(cst.result_dir, [_graph for _, _graph, _ in rows], executor,
+                                              max_workers, progress, cancel_event)
+
+    freq_texts: list[str] = []
+    for _, _, _freq_text in rows:
+        freq_texts.extend(parse_band_bounds(_freq_text)[0])
+    freq_texts = list(dict.fromkeys(freq_texts))
+    _, freqs, bounds = parse_band_bounds(", ".join(freq_texts))
+    freq_indices = {_freq_text: i for i, _freq_text in enumerate(freq_texts)}
+
+    # 按频率网格分组, 每组一次计算全部端口 × 全部频段
+    groups: dict[tuple, list[int]] = {}
+    for i, _chart in enumerate(charts):
+        groups.setdefault((len(_chart.x), hash(np.asarray(_chart.x).tobytes())), []).append(i)
+    row_stats: list[np.ndarray | None] = [None] * len(rows)
+    for _indices in groups.values():
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+        with Tracer.span("cal_s11_stats_matrix", ports=len(_indices), bands=len(freq_texts)):
+            s = np.stack([np.asarray(charts[_i].y) for _i in _indices])
+            group_stats = cal_s11_stats_matrix(charts[_indices[0]].x, s, bounds[:, 0], bounds[:, 1], threshold_db)
+        for __i, __stats in zip(_indices, group_stats):
+            row_stats[__i] = __stats
+
+    antenna_s11_map: dict[str, dict[str, tuple[float]]] = {}
+    for (_antenna_name, _, _freq_text), _stats in zip(rows, row_stats):
+        freq_s11_map: dict[str, tuple[float]] = {}
+        for __freq_text in parse_band_bounds(_freq_text)[0]:
+            index = freq_indices[__freq_text]
+            key = __freq_text if np.isnan(_stats[index]["max_db"]) else freqs[index].name
+            freq_s11_map[key] = tuple(float(_stats[index][___field]) for ___field in S11_STATS_DTYPE.names)
+        antenna_s11_map |= {_antenna_name: freq_s11_map}
+    return antenna_s11_map
+
+
+def get_s11_sheet(antenna_s11_map: dict[str, dict[str, tuple[float]]]) -> tuple[list[str], list[list]]:
+    """S11 统计的工作表内容 (表头, 行), 供导出时作为附加工作表"""
+    rows: list[list] = []
+    for _antenna, _s11_map in antenna_s11_map.items():
+        for __freq_text, __values in _s11_map.items():
+            rows.append([_antenna, __freq_text,
+                         *(None if np.isnan(___value) else round(___value, 4) for ___value in __values)])
+    return ["天线", "频段", *S11_STATS_DTYPE.names], rows
 
-        antenna_eff_map |= {_antenna_name: freq_eff_map}
-    return antenna_eff_map
 
-def export_antenna_eff_map(antenna_eff_map: dict[str, dict[str, tuple[float]]], excel_dir : Path):
+def load_s_matrix(cst: CST.Contents, ports: list[int], executor: str = "thread", max_workers: int | None = None,
+                  progress: Callable[[int, int], None] | None = None,
+                  cancel_event: threading.Event | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    一次性加载端口之间的全部 Si,j, 返回 (频率网格, (频点数, 端口数, 端口数) 的复数矩阵)
+    网格不同的曲线重采样到公共网格; 缺少的 Si,j 按互易取 Sj,i, 仍缺少时为 NaN
+    """
+    s_param_graphs = extract_s_param_graphs(cst)
+    pairs = [(i, j) for i, _a in enumerate(ports) for j, _b in enumerate(ports) if (_a, _b) in s_param_graphs]
+    graphs = [s_param_graphs[(ports[_i], ports[_j])] for _i, _j in pairs]
+    charts = cst.chart_cache.load_line_charts(cst.result_dir, graphs, executor, max_workers, progress, cancel_event)
+    if not charts:
+        return np.empty(0), np.empty((0, len(ports), len(ports)), dtype=np.complex128)
+
+    x = np.asarray(charts[0].x)
+    if all(np.array_equal(_chart.x, x) for _chart in charts[1:]):
+        rows = np.stack([np.asarray(_chart.y) for _chart in charts])
+    else:
+        x, rows = CST.LineChart.resample_charts(charts)
+    s = np.full((x.size, len(ports), len(ports)), np.nan, dtype=np.complex128)
+    for (_i, _j), _row in zip(pairs, rows):
+        s[:, _i, _j] = _row
+    missing = np.isnan(s).all(axis=0)
+    s[:, missing] = np.swapaxes(s, 1, 2)[:, missing]
+    return x, s
+
+
+class MimoTable(object):
+    """
+    端口两两之间在各频段上的隔离度 -20*log10|Si,j| (dB) 与包络相关系数 ECC 的统计,
+    isolation 与 ecc 形状均为 (频段数, 端口数, 端口数), 对角线与无法计算的组合为 NaN
+    """
+
+    def __init__(self, antenna_names: list[str], freq_texts: list[str], isolation: np.ndarray, ecc: np.ndarray):
+        self.__antenna_names = antenna_names
+        self.__freq_texts = freq_texts
+        self.__isolation = isolation
+        self.__ecc = ecc
+
+    @property
+    def antenna_names(self):
+        return self.__antenna_names
+
+    @property
+    def freq_texts(self):
+        return self.__freq_texts
+
+    @property
+    def isolation(self) -> np.ndarray:
+        return self.__isolation
+
+    @property
+    def ecc(self) -> np.ndarray:
+        return self.__ecc
+
+    def worst_pairs(self, count: int = 10) -> list[tuple[str, str, str, float, float]]:
+        """按频段内最差隔离度升序的端口对: (频段, 天线, 天线, 最差隔离度, 最大 ECC)"""
+        pairs: list[tuple[str, str, str, float, float]] = []
+        for k, _freq_text in enumerate(self.__freq_texts):
+            for i, __a in enumerate(self.__antenna_names):
+                for j in range(i + 1, len(self.__antenna_names)):
+                    isolation = float(np.fmin(self.__isolation["min"][k, i, j], self.__isolation["min"][k, j, i]))
+                    ecc = float(np.fmax(self.__ecc["max"][k, i, j], self.__ecc["max"][k, j, i]))
+                    if not np.isnan(isolation):
+                        pairs.append((_freq_text, __a, self.__antenna_names[j], isolation, ecc))
+        return sorted(pairs, key=lambda _pair: _pair[3])[:count]
+
+
+def cal_mimo_table(cst: CST.Contents, antenna_table: list[tuple[str, str, str]], executor: str = "thread",
+                   max_workers: int | None = None, progress: Callable[[int, int], None] | None = None,
+                   cancel_event: threading.Event | None = None) -> MimoTable:
+    """
+    天线表中选择了频段的端口 (按 [ACn] 对应 Sn,n) 两两之间, 在所有所选频段上的隔离度与 ECC
+    ECC 按 N 端口无耗近似由 S 矩阵计算: ρij = |(S^H S)ij|² / ((1 - (S^H S)ii)(1 - (S^H S)jj)),
+    S^H S 对全部频点一次 einsum 得到; 只有幅值 (实数) 数据时 ECC 为 NaN
+    所有端口对与频段通过 cal_band_stats_matrix 一次归约
+    """
+    antenna_names: list[str] = []
+    ports: list[int] = []
+    freq_texts: list[str] = []
+    for _antenna_name, _graph_name, _freq_text in antenna_table:
+        match = re.fullmatch(r"AC(\d+)", _get_port_tag(_graph_name))
+        if _freq_text and match and int(match[1]) not in ports:
+            antenna_names.append(_antenna_name)
+            ports.append(int(match[1]))
+            freq_texts.extend(parse_band_bounds(_freq_text)[0])
+    freq_texts = list(dict.fromkeys(freq_texts))
+    _, freqs, bounds = parse_band_bounds(", ".join(freq_texts))
+
+    x, s = load_s_matrix(cst, ports, executor, max_workers, progress, cancel_event)
+    count = len(ports)
+    isolation = np.full((len(freq_texts), count, count), np.nan, dtype=BAND_STATS_DTYPE)
+    ecc = np.full((len(freq_texts), count, count), np.nan, dtype=BAND_STATS_DTYPE)
+    if x.size < 2 or not freq_texts:
+        return MimoTable(antenna_names, freq_texts, isolation, ecc)
+    if cancel_event is not None and cancel_event.is_set():
+        raise CancelledError()
+
+    with Tracer.span("cal_mimo_table", ports=count, samples=x.size, bands=len(freq_texts)):
+        magnitude = np.abs(s)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            isolation_curves = -20.0 * np.log10(magnitude)
+        isolation_curves[:, np.arange(count), np.arange(count)] = np.nan
+
+        # 只有幅值数据时丢失相位, 无法计算 ECC
+        is_complex = np.any(np.imag(np.nan_to_num(s)) != 0.0)
+        if is_complex:
+            hermitian = np.einsum("fki,fkj->fij", np.conj(s), s)
+            residual = 1.0 - np.real(np.diagonal(hermitian, axis1=1, axis2=2))
+            # 非无源的频点 (端口功率之和不小于 1) 无法按该近似计算
+            residual[residual <= 0.0] = np.nan
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ecc_curves = np.abs(hermitian) ** 2 / (residual[:, :, np.newaxis] * residual[:, np.newaxis, :])
+            ecc_curves[:, np.arange(count), np.arange(count)] = np.nan
+        else:
+            ecc_curves = np.full(s.shape, np.nan)
+
+        # (频点, 端口, 端口) 展平为 (端口对, 频点) 后一次计算全部端口对 × 频段
+        pair_curves = np.concatenate([isolation_curves.reshape(x.size, -1).T, ecc_curves.reshape(x.size, -1).T])
+        pair_stats = cal_band_stats_matrix(x, pair_curves, bounds[:, 0], bounds[:, 1])
+        isolation[:] = pair_stats[:count * count].T.reshape(len(freq_texts), count, count)
+        ecc[:] = pair_stats[count * count:].T.reshape(len(freq_texts), count, count)
+    freq_texts = [_freq_text if np.isnan(isolation["min"][k]).all() else _freq.name
+                  for k, (_freq_text, _freq) in enumerate(zip(freq_texts, freqs))]
+    return MimoTable(antenna_names, freq_texts, isolation, ecc)
+
+
+def get_mimo_sheets(mimo_table: MimoTable) -> dict[str, tuple[list[str], list[list]]]:
+    """
+    每个频段一个端口对矩阵块: 隔离度取频段内最小值 (最差), ECC 取最大值, 供导出时作为附加工作表
+    """
+    sheets: dict[str, tuple[list[str], list[list]]] = {}
+    for _title, _caption, _values in (("隔离度", "隔离度 (dB), 频段内最小值", mimo_table.isolation["min"]),
+                                      ("ECC", "ECC, 频段内最大值", mimo_table.ecc["max"])):
+        rows: list[list] = []
+        for k, __freq_text in enumerate(mimo_table.freq_texts):
+            rows.append([__freq_text, *mimo_table.antenna_names])
+            for i, ___antenna_name in enumerate(mimo_table.antenna_names):
+                rows.append([___antenna_name,
+                             *(None if np.isnan(_value) else round(float(_value), 4) for _value in _values[k, i])])
+            rows.append([])
+        sheets[_title] = ([_caption], rows)
+    return sheets
+
+
+class SweepTable(object):
+    """参数扫描的频段统计表, stats 形状为 (天线数, 频段数, 运行数), 缺失的组合为 NaN"""
+
+    def __init__(self, antenna_names: list[str], freq_texts: list[str], run_labels: list[str], stats: np.ndarray):
+        self.__antenna_names = antenna_names
+        self.__freq_texts = freq_texts
+        self.__run_labels = run_labels
+        self.__stats = stats
+
+    @property
+    def antenna_names(self):
+        return self.__antenna_names
+
+    @property
+    def freq_texts(self):
+        return self.__freq_texts
+
+    @property
+    def run_labels(self):
+        return self.__run_labels
+
+    @property
+    def stats(self) -> np.ndarray:
+        return self.__stats
+
+    def get(self, antenna_name: str, freq_text: str) -> np.ndarray:
+        """某天线某频段在各次运行上的统计值, 形状为 (运行数,)"""
+        return self.__stats[self.__antenna_names.index(antenna_name), self.__freq_texts.index(freq_text)]
+
+    def best_runs(self, field: str = "mean") -> dict[str, dict[str, tuple[str, float]]]:
+        """每个天线每个频段 field 最大的运行: {天线: {频段: (运行, 值)}}"""
+        values = self.__stats[field]
+        best_runs: dict[str, dict[str, tuple[str, float]]] = {}
+        for i, _antenna_name in enumerate(self.__antenna_names):
+            for j, __freq_text in enumerate(self.__freq_texts):
+                if np.isnan(values[i, j]).all():
+                    continue
+                k = int(np.nanargmax(values[i, j]))
+                best_runs.setdefault(_antenna_name, {})[__freq_text] = (self.__run_labels[k], float(values[i, j, k]))
+        return best_runs
+
+    def best_run(self, field: str = "mean") -> tuple[str, float]:
+        """所有天线与频段中最差值最大的运行: (运行, 最差值)"""
+        with np.errstate(invalid="ignore"):
+            worst = np.nanmin(self.__stats[field].reshape(-1, len(self.__run_labels)), axis=0)
+        if np.isnan(worst).all():
+            return "", float("nan")
+        k = int(np.nanargmax(worst))
+        return self.__run_labels[k], float(worst[k])
+
+
+def cal_antenna_sweep_table(cst: CST.Contents, antenna_table: list[tuple[str, str, str]],
+                            executor: str = "thread", max_workers: int | None = None,
+                            progress: Callable[[int, int], None] | None = None,
+                            cancel_event: threading.Event | None = None) -> SweepTable:
+    """
+    同一效率图 (treepath) 的多个参数扫描运行并行加载并合并为 (运行数, 频点数) 的矩阵,
+    每个天线的全部频段与运行一次性归约; 运行按 SweepChart.run_labels 对齐, 频段按拆分后的文本对齐
+    """
+    rows = [(_antenna_name, _graph_name, _freq_text) for _antenna_name, _graph_name, _freq_text in antenna_table
+            if _freq_text]
+    sweep_graphs: list[list[CST.Graph]] = []
+    for _, _graph_name, _ in rows:
+        groups = CST.SweepChart.group_graphs(cst.catalogue.find_by_name(_graph_name))
+        sweep_graphs.append(next(iter(groups.values()), []))
+
+    # 所有运行一次性并行加载, 再按天线拆分
+    graphs = [_graph for _graphs in sweep_graphs for _graph in _graphs]
+    charts = cst.chart_cache.load_line_charts(cst.result_dir, graphs, executor, max_workers, progress, cancel_event)
+    sweep_charts: list[CST.SweepChart] = []
+    offset = 0
+    for _graphs in sweep_graphs:
+        sweep_charts.append(CST.SweepChart.from_line_charts(charts[offset: offset + len(_graphs)]))
+        offset += len(_graphs)
+
+    freq_texts: list[str] = []
+    run_labels: list[str] = []
+    for (_, _, _freq_text), _sweep_chart in zip(rows, sweep_charts):
+        freq_texts.extend(parse_band_bounds(_freq_text)[0])
+        # 运行按标签在天线之间对齐, 同一结果内的标签必须唯一, 否则各运行会写入同一列而相互覆盖
+        labels = _sweep_chart.run_labels
+        if len(set(labels)) != len(labels):
+            raise ValueError(f"{_sweep_chart.treepath} 的运行标签重复: {labels}")
+        run_labels.extend(labels)
+    freq_texts = list(dict.fromkeys(freq_texts))
+    run_labels = list(dict.fromkeys(run_labels))
+    freq_indices = {_freq_text: i for i, _freq_text in enumerate(freq_texts)}
+    run_indices = {_run_label: i for i, _run_label in enumerate(run_labels)}
+
+    stats = np.full((len(rows), len(freq_texts), len(run_labels)), np.nan, dtype=BAND_STATS_DTYPE)
+    for i, ((_, _, _freq_text), _sweep_chart) in enumerate(zip(rows, sweep_charts)):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+        if not _sweep_chart.run_count:
+            continue
+        with Tracer.span("cal_band_stats_matrix", graph=_sweep_chart.name, runs=_sweep_chart.run_count):
+            band_texts, _, bounds = parse_band_bounds(_freq_text)
+            band_stats = cal_band_stats_matrix(_sweep_chart.x, _sweep_chart.y, bounds[:, 0], bounds[:, 1])
+        band_index = [freq_indices[_band_text] for _band_text in band_texts]
+        run_index = [run_indices[_run_label] for _run_label in _sweep_chart.run_labels]
+        stats[i][np.ix_(band_index, run_index)] = band_stats.T
+    return SweepTable([_antenna_name for _antenna_name, _, _ in rows], freq_texts, run_labels, stats)
+
+
+class DiffTable(object):
+    """
+    多个工程版本的频段统计, stats 形状为 (天线数, 频段数, 版本数), 缺失的组合为 NaN
+    dips 为各版本相对基准版本逐频点差值在频段内的最小值 (最差跌落)
+    requested 为 (天线数, 频段数) 的布尔矩阵, 标记各天线实际分配的频段; 为 None 时视为全部分配
+    """
+
+    def __init__(self, antenna_names: list[str], freq_texts: list[str], labels: list[str], baseline: int,
+                 stats: np.ndarray, dips: np.ndarray, requested: np.ndarray | None = None):
+        self.__antenna_names = antenna_names
+        self.__freq_texts = freq_texts
+        self.__labels = labels
+        self.__baseline = baseline
+        self.__stats = stats
+        self.__dips = dips
+        self.__requested = (np.ones(stats.shape[:2], dtype=bool) if requested is None
+                            else np.asarray(requested, dtype=bool))
+
+    @property
+    def antenna_names(self):
+        return self.__antenna_names
+
+    @property
+    def freq_texts(self):
+        return self.__freq_texts
+
+    @property
+    def labels(self):
+        return self.__labels
+
+    @property
+    def baseline(self):
+        return self.__baseline
+
+    @property
+    def stats(self) -> np.ndarray:
+        return self.__stats
+
+    @property
+    def dips(self) -> np.ndarray:
+        return self.__dips
+
+    @property
+    def requested(self) -> np.ndarray:
+        return self.__requested
+
+    def deltas(self) -> np.ndarray:
+        """各版本统计值减去基准版本, 形状与 stats 相同"""
+        deltas = np.empty_like(self.__stats)
+        for _field in BAND_STATS_DTYPE.names:
+            deltas[_field] = self.__stats[_field] - self.__stats[_field][..., self.__baseline:self.__baseline + 1]
+        return deltas
+
+    def ranked_rows(self, field: str = "mean") -> list[dict]:
+        """
+        非基准版本的差值按 field 升序排列 (退化最大的在前), 无法比较的组合排在最后;
+        只列出天线实际分配的频段, 其他天线的频段不产生行
+        """
+        deltas = self.deltas()
+        rows: list[dict] = []
+        for i, _antenna_name in enumerate(self.__antenna_names):
+            for j, __freq_text in enumerate(self.__freq_texts):
+                if not self.__requested[i, j]:
+                    continue
+                for k, ___label in enumerate(self.__labels):
+                    if k == self.__baseline:
+                        continue
+                    row = {"antenna": _antenna_name, "band": __freq_text, "revision": ___label}
+                    row |= {_field: float(deltas[_field][i, j, k]) for _field in BAND_STATS_DTYPE.names}
+                    row["dip"] = float(self.__dips[i, j, k])
+                    rows.append(row)
+        return sorted(rows, key=lambda _row: (np.isnan(_row[field]), _row[field]))
+
+
+def cal_projects_diff_table(csts: list[CST.Contents], freq_map: dict[str, str], labels: list[str] | None = None,
+                            baseline: int = 0, executor: str = "thread", max_workers: int | None = None,
+                            progress: Callable[[int, int], None] | None = None,
+                            cancel_event: threading.Event | None = None) -> DiffTable:
+    """
+    比较同一机型的多个版本: 天线按效率图名称中的 [ACn] 端口标记对应, freq_map 为天线→频段文本
+    每个工程的效率图只加载一次 (同一工程重复出现时共用), 各版本曲线重采样到公共网格后,
+    每个天线的全部频段与版本一次性归约; progress(已加载工程数, 工程总数)
+    """
+    labels = labels or [_cst.name for _cst in csts]
+    antenna_tables: list[list[tuple[str, str, str]]] = [
+        [(_antenna_name, _graph_name, freq_map.get(_antenna_name, ""))
+         for _antenna_name, _graph_name in extract_antennas(_cst)] for _cst in csts]
+    antenna_names = list(dict.fromkeys(_antenna_name for _antenna_table in antenna_tables
+                                       for _antenna_name, _, _freq_text in _antenna_table if _freq_text))
+
+    loaded: dict[Path, dict[str, CST.LineChart]] = {}
+    chart_maps: list[dict[str, CST.LineChart]] = []
+    for i, (_cst, _antenna_table) in enumerate(zip(csts, antenna_tables)):
+        if _cst.project not in loaded:
+            eff_chart_map = load_eff_chart_map(_cst, _antenna_table, executor, max_workers,
+                                               cancel_event=cancel_event)
+            loaded[_cst.project] = {_antenna_name: eff_chart_map[_graph_name]
+                                    for _antenna_name, _graph_name, _freq_text in _antenna_table if _freq_text}
+        chart_maps.append(loaded[_cst.project])
+        if progress is not None:
+            progress(i + 1, len(csts))
+
+    freq_texts: list[str] = []
+    for _antenna_name in antenna_names:
+        freq_texts.extend(parse_band_bounds(freq_map[_antenna_name])[0])
+    freq_texts = list(dict.fromkeys(freq_texts))
+    freq_indices = {_freq_text: i for i, _freq_text in enumerate(freq_texts)}
+
+    stats = np.full((len(antenna_names), len(freq_texts), len(csts)), np.nan, dtype=BAND_STATS_DTYPE)
+    dips = np.full((len(antenna_names), len(freq_texts), len(csts)), np.nan)
+    requested = np.zeros((len(antenna_names), len(freq_texts)), dtype=bool)
+    for i, _antenna_name in enumerate(antenna_names):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+        requested[i, [freq_indices[_band_text] for _band_text in parse_band_bounds(freq_map[_antenna_name])[0]]] = True
+        revisions = [k for k, _chart_map in enumerate(chart_maps) if _antenna_name in _chart_map]
+        try:
+            grid, matrix = CST.LineChart.resample_charts([chart_maps[_k][_antenna_name] for _k in revisions])
+        except ValueError:
+            # 各版本频率范围没有交集
+            continue
+
+        with Tracer.span("cal_band_stats_matrix", graph=_antenna_name, revisions=len(revisions)):
+            y = np.full((len(csts), grid.size), np.nan)
+            y[revisions] = np.real(matrix)
+            band_texts, _, bounds = parse_band_bounds(freq_map[_antenna_name])
+            band_stats = cal_band_stats_matrix(grid, y, bounds[:, 0], bounds[:, 1])
+            dip_stats = cal_band_stats_matrix(grid, y - y[baseline], bounds[:, 0], bounds[:, 1])
+        band_index = [freq_indices[_band_text] for _band_text in band_texts]
+        stats[i, band_index] = band_stats.T
+        dips[i, band_index] = dip_stats["min"].T
+    return DiffTable(antenna_names, freq_texts, labels, baseline, stats, dips, requested)
+
+
+def export_diff_table(diff_table: DiffTable, excel_file: Path, field: str = "mean") -> Path:
+    """以只写模式导出排序后的差值表, 每行一个 (天线, 频段, 版本)"""
+    from openpyxl.workbook import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("差值")
+    ws.append(["天线", "频段", "版本", *BAND_STATS_DTYPE.names, "dip"])
+    for _row in diff_table.ranked_rows(field):
+        ws.append([_row["antenna"], _row["band"], _row["revision"],
+                   *(None if np.isnan(_row[_field]) else round(_row[_field], 4)
+                     for _field in (*BAND_STATS_DTYPE.names, "dip"))])
+    with Tracer.span("openpyxl.save", sheets=1):
+        wb.save(excel_file)
+    return excel_file
+
+
+def iter_eff_records(project: str, antenna_eff_map: dict[str, dict[str, tuple[float]]]):
+    """展开为长格式记录 (project, antenna, band, f_lo, f_hi, first, max, last, mean), 无效值为 NaN"""
+    for _antenna, _eff_map in antenna_eff_map.items():
+        for __freq_text, __effs in _eff_map.items():
+            freqs = FrequencyManager.parse_freq_text(__freq_text)
+            f_lo, f_hi = get_band_bounds(freqs[0]) if freqs else (np.nan, np.nan)
+            if tuple(__effs) == (-1, -1, -1, -1):
+                __effs = (np.nan, np.nan, np.nan, np.nan)
+            yield (project, _antenna, __freq_text, f_lo, f_hi, *map(float, __effs))
+
+
+def export_antenna_eff_map(antenna_eff_map: dict[str, dict[str, tuple[float]]], excel_dir : Path,
+                           streaming: bool = False, writers: list[TableWriter] | None = None,
+                           project: str = "",
+                           extra_sheets: dict[str, tuple[list[str], list[list]]] | None = None) -> Path:
+    """
+    导出 Excel; writers 不为空时同时把原始统计值追加到列式表中 (写入器由调用方关闭)
+    extra_sheets 为 {工作表名: (表头, 行)}, 写在效率工作表之后, 如 get_s11_sheet 的结果
+    """
+    with Tracer.span("export_antenna_eff_map", antennas=len(antenna_eff_map), streaming=streaming):
+        return _export_antenna_eff_map(antenna_eff_map, excel_dir, streaming, writers, project, extra_sheets)
+
+
+def _export_antenna_eff_map(antenna_eff_map: dict[str, dict[str, tuple[float]]], excel_dir : Path,
+                            streaming: bool, writers: list[TableWriter] | None, project: str,
+                            extra_sheets: dict[str, tuple[list[str], list[list]]] | None) -> Path:
+    for _writer in writers or []:
+        _writer.write_rows(iter_eff_records(project, antenna_eff_map))
+
+    excel_file = excel_dir / f"eff_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"
+    if streaming:
+        return export_projects_eff_map({"效率": antenna_eff_map}, excel_file, extra_sheets)
+
+    # openpyxl 只在导出时导入, 不拖慢启动与无界面的调用
+    from openpyxl.styles import Alignment, Font
+    from openpyxl.utils import get_column_letter
+    from openpyxl.workbook import Workbook
+    from openpyxl.worksheet.worksheet import Worksheet
+
     wb = Workbook()
     ws : Worksheet = wb.active
     ws.title = "效率"
@@ -97,6 +1005,91 @@ def export_antenna_eff_map(antenna_eff_map: dict[str, dict[str, tuple[float]]],
             ws.cell(row=row+2, column=col).alignment = alignment
             col_letter = get_column_letter(col)
             ws.column_dimensions[col_letter].width = 25
+    for _title, (_header, _rows) in (extra_sheets or {}).items():
+        _write_table_sheet(wb.create_sheet(_title), _header, _rows)
 
     # 保存文件
-    wb.save(excel_dir / f"eff_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx")
+    with Tracer.span("openpyxl.save"):
+        wb.save(excel_file)
+    return excel_file
+
+
+def export_projects_eff_map(project_eff_maps: dict[str, dict[str, dict[str, tuple[float]]]],
+                            excel_file: Path,
+                            extra_sheets: dict[str, tuple[list[str], list[list]]] | None = None) -> Path:
+    """以只写模式流式导出, 每个工程一个工作表, 版式与 export_antenna_eff_map 相同"""
+    from openpyxl.styles import Alignment, Font, NamedStyle
+    from openpyxl.workbook import Workbook
+
+    wb = Workbook(write_only=True)
+    title_style = NamedStyle(name="eff_title", font=Font(bold=True, italic=False, name="微软雅黑", size=14),
+                             alignment=Alignment(horizontal='center', vertical='center'))
+    value_style = NamedStyle(name="eff_value", font=Font(name="Calibri", size=11),
+                             alignment=Alignment(horizontal='center', vertical='center'))
+    wb.add_named_style(title_style)
+    wb.add_named_style(value_style)
+
+    sheet_titles: list[str] = []
+    for _project, _antenna_eff_map in project_eff_maps.items():
+        sheet_title = _get_sheet_title(_project, sheet_titles)
+        sheet_titles.append(sheet_title)
+        _write_eff_sheet(wb.create_sheet(sheet_title), _antenna_eff_map)
+    for _title, (_header, _rows) in (extra_sheets or {}).items():
+        sheet_title = _get_sheet_title(_title, sheet_titles)
+        sheet_titles.append(sheet_title)
+        _write_table_sheet(wb.create_sheet(sheet_title), _header, _rows)
+
+    with Tracer.span("openpyxl.save", sheets=len(sheet_titles)):
+        wb.save(excel_file)
+    return excel_file
+
+
+def _get_sheet_title(name: str, used_titles: list[str]) -> str:
+    # 工作表名称不能包含 []:*?/\ 且不超过 31 个字符
+    base_title = re.sub(r"[\[\]:*?/\\]", "_", name)[:31] or "Sheet"
+    title = base_title
+    index = 2
+    while title in used_titles:
+        suffix = f" ({index})"
+        title = base_title[:31 - len(suffix)] + suffix
+        index += 1
+    return title
+
+
+def _write_eff_sheet(ws, antenna_eff_map: dict[str, dict[str, tuple[float]]]) -> None:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    # 只写模式下行高、列宽与合并单元格须在写入行之前设置
+    max_freq_num = max((len(_eff_map) for _eff_map in antenna_eff_map.values()), default=0)
+    for _col in range(2, max_freq_num + 2):
+        ws.column_dimensions[get_column_letter(_col)].width = 25
+    for i in range(len(antenna_eff_map)):
+        row = i * 3 + 1
+        ws.merged_cells.add(f"A{row}:A{row + 2}")
+        for __row_index in range(row, row + 3):
+            ws.row_dimensions[__row_index].height = 20
+
+    def styled_cell(value, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    for _antenna, _eff_map in antenna_eff_map.items():
+        freq_row = [styled_cell(_antenna, "eff_title")]
+        value_row = [None]
+        avg_row = [None]
+        for __freq, __effs in _eff_map.items():
+            freq_row.append(styled_cell(__freq, "eff_title"))
+            value_row.append(styled_cell(f"{__effs[0]:.2f}_{__effs[1]:.2f}_{__effs[2]:.2f}", "eff_value"))
+            avg_row.append(styled_cell(f"{__effs[3]:.2f}", "eff_value"))
+        ws.append(freq_row)
+        ws.append(value_row)
+        ws.append(avg_row)
+
+
+def _write_table_sheet(ws, header: list[str], rows: list[list]) -> None:
+    # 普通与只写工作簿通用: 只使用 append
+    ws.append(header)
+    for _row in rows:
+        ws.append(_row)
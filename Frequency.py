@@ -1,4 +1,8 @@
+import json
 import re
+from pathlib import Path
+
+from CFG import ConfigDB
 
 
 class Frequency(object):
@@ -98,6 +102,47 @@ class FrequencyBand(object):
             return f"上行: {self.uplink.inf}~{self.uplink.sup} {self.uplink.unit}, 下行: {self.downlink.inf}~{self.downlink.sup} {self.downlink.unit}"
 
 
+class IntervalIndex(object):
+    """静态区间索引: 按下限排序的隐式平衡二叉树, 每个节点记录子树上限的最大值"""
+
+    def __init__(self, intervals: list[tuple[float, float, object]]):
+        intervals = sorted(intervals, key=lambda _interval: (_interval[0], _interval[1]))
+        self.__infs: list[float] = [_inf for _inf, _, _ in intervals]
+        self.__sups: list[float] = [_sup for _, _sup, _ in intervals]
+        self.__items: list[object] = [_item for _, _, _item in intervals]
+        self.__max_sups: list[float] = list(self.__sups)
+        self.__build(0, len(intervals))
+
+    def overlap(self, inf: float, sup: float) -> list:
+        """与闭区间 [inf, sup] 相交的所有条目, 按下限排序"""
+        items: list = []
+        self.__query(0, len(self.__infs), inf, sup, items)
+        return items
+
+    def __build(self, lower: int, upper: int) -> float:
+        if lower >= upper:
+            return float("-inf")
+        mid = (lower + upper) // 2
+        self.__max_sups[mid] = max(self.__sups[mid], self.__build(lower, mid), self.__build(mid + 1, upper))
+        return self.__max_sups[mid]
+
+    def __query(self, lower: int, upper: int, inf: float, sup: float, items: list) -> None:
+        if lower >= upper:
+            return None
+        mid = (lower + upper) // 2
+        if self.__max_sups[mid] < inf:
+            return None
+        self.__query(lower, mid, inf, sup, items)
+        if self.__infs[mid] > sup:
+            return None
+        if self.__sups[mid] >= inf:
+            items.append(self.__items[mid])
+        self.__query(mid + 1, upper, inf, sup, items)
+
+    def __len__(self) -> int:
+        return len(self.__infs)
+
+
 class FrequencyManager(object):
     __all_band: list[FrequencyBand] = [
         FrequencyBand("5G NR", "n1", [1920.0, 1980.0, 2110.0, 2170.0], "FDD"),
@@ -150,12 +195,18 @@ class FrequencyManager(object):
         FrequencyBand("Galileo", "Galileo E5a", [1176.45], None),
     ]
 
+    __SINGLE_PATTERN = re.compile(r"^(\d+\.?\d*)\s+([kMG]Hz)$")
+    __RANGE_PATTERN = re.compile(r"^(\d+\.?\d*)~(\d*\.?\d+)\s+([kMG]Hz)$")
+    __PARSE_CACHE_SIZE: int = 4096
+
+    __band_index: dict[str, FrequencyBand] | None = None
+    __band_map: dict[str, list[FrequencyBand]] | None = None
+    __interval_index: IntervalIndex | None = None
+    __parse_cache: dict[str, tuple[Frequency | FrequencyBand, ...]] = {}
+
     @classmethod
     def get_band(cls, name: str) -> FrequencyBand | None:
-        for _band in cls.__all_band:
-            if _band.name == name:
-                return _band
-        return None
+        return cls.__get_band_index().get(name)
 
     @classmethod
     def get_all_band(cls) -> list[FrequencyBand]:
@@ -163,25 +214,94 @@ class FrequencyManager(object):
 
     @classmethod
     def get_band_map(cls) -> dict[str, list[FrequencyBand]]:
-        band_map: dict[str, list[FrequencyBand]] = {}
-        for _band in cls.__all_band:
-            if _band.technology in band_map:
-                band_map[_band.technology].append(_band)
-            else:
-                band_map[_band.technology] = [_band]
-        return band_map
+        if cls.__band_map is None:
+            band_map: dict[str, list[FrequencyBand]] = {}
+            for _band in cls.__all_band:
+                if _band.technology in band_map:
+                    band_map[_band.technology].append(_band)
+                else:
+                    band_map[_band.technology] = [_band]
+            cls.__band_map = band_map
+        return cls.__band_map
+
+    @classmethod
+    def find_overlapping_bands(cls, inf: float, sup: float) -> list[FrequencyBand]:
+        """上行、下行或单一链路与 [inf, sup] (MHz) 相交的频段, 保持注册顺序"""
+        if cls.__interval_index is None:
+            intervals: list[tuple[float, float, object]] = []
+            for i, _band in enumerate(cls.__all_band):
+                for __freq in (_band.uplink, _band.downlink, _band.link):
+                    if __freq is not None:
+                        intervals.append((__freq.inf, __freq.sup, i))
+            cls.__interval_index = IntervalIndex(intervals)
+        indices = sorted(set(cls.__interval_index.overlap(inf, sup)))
+        return [cls.__all_band[_i] for _i in indices]
+
+    @classmethod
+    def register_bands(cls, bands: list[FrequencyBand]) -> None:
+        """注册自定义频段; 与已有频段同名时保留先注册的频段"""
+        cls.__all_band.extend(bands)
+        cls.__band_index = None
+        cls.__band_map = None
+        cls.__interval_index = None
+        cls.__parse_cache.clear()
+
+    @classmethod
+    def load_bands(cls, band_file: Path) -> list[FrequencyBand]:
+        """
+        从 JSON 文件加载自定义频段, 格式为
+        [{"technology": "...", "name": "...", "freq_values": [...], "duplex": "FDD"}, ...]
+        """
+        with open(band_file, mode="r", encoding="utf-8") as f:
+            band_dicts: list[dict] = json.load(f)
+        bands = [cls.__to_band(_band_dict) for _band_dict in band_dicts]
+        cls.register_bands(bands)
+        return bands
+
+    @classmethod
+    def load_bands_from_db(cls, db: ConfigDB, section_name: str = "Band") -> list[FrequencyBand]:
+        """从 ConfigDB 分区加载自定义频段, 键为频段名称, 值为 JSON 格式的其余字段"""
+        bands: list[FrequencyBand] = []
+        for _name, _value in db.select_section(section_name).items():
+            bands.append(cls.__to_band(json.loads(_value) | {"name": _name}))
+        cls.register_bands(bands)
+        return bands
 
     @classmethod
     def parse_freq_text(cls, freq_text: str) -> list[Frequency | FrequencyBand]:
+        freqs = cls.__parse_cache.get(freq_text)
+        if freqs is None:
+            freqs = tuple(cls.__parse_freq_text(freq_text))
+            if len(cls.__parse_cache) >= cls.__PARSE_CACHE_SIZE:
+                cls.__parse_cache.clear()
+            cls.__parse_cache[freq_text] = freqs
+        return list(freqs)
+
+    @classmethod
+    def __parse_freq_text(cls, freq_text: str) -> list[Frequency | FrequencyBand]:
         freqs: list[Frequency | FrequencyBand] = []
         freq_texts: list[str] = [item.strip() for item in freq_text.split(",")]
         for _freq_text in freq_texts:
-            if match := re.match(r"^(\d+\.?\d*)\s+([kMG]Hz)$", _freq_text):
+            if match := cls.__SINGLE_PATTERN.match(_freq_text):
                 freqs.append(Frequency(float(match[1]), float(match[1]), match[2]))
-            elif match := re.match(r"^(\d+\.?\d*)~(\d*\.?\d+)\s+([kMG]Hz)$", _freq_text):
+            elif match := cls.__RANGE_PATTERN.match(_freq_text):
                 freqs.append(Frequency(float(match[1]), float(match[2]), match[3]))
             else:
                 band = cls.get_band(_freq_text)
                 if band:
                     freqs.append(band)
         return freqs
+
+    @classmethod
+    def __get_band_index(cls) -> dict[str, FrequencyBand]:
+        if cls.__band_index is None:
+            band_index: dict[str, FrequencyBand] = {}
+            for _band in cls.__all_band:
+                band_index.setdefault(_band.name, _band)
+            cls.__band_index = band_index
+        return cls.__band_index
+
+    @staticmethod
+    def __to_band(band_dict: dict) -> FrequencyBand:
+        return FrequencyBand(band_dict["technology"], band_dict["name"],
+                             [float(_value) for _value in band_dict["freq_values"]], band_dict.get("duplex"))
@@ -1,4 +1,5 @@
-import os
+import ctypes
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -9,6 +10,8 @@ from .Trial import Trial
 
 class TrialManager(object):
     __SECRET_KEY: str = "-----trial------"
+    __FILE_ATTRIBUTE_HIDDEN: int = 0x2
+    __user_status: Status | None = None
 
     @classmethod
     def generate_trial(cls, duration: int, trial_dir: Path) -> Path:
@@ -39,6 +42,13 @@ class TrialManager(object):
 
     @classmethod
     def check_user_trial(cls) -> Status:
+        """检查并更新用户试用凭证; 同一进程内只检查一次, 之后返回缓存的结果"""
+        if cls.__user_status is None:
+            cls.__user_status = cls.__check_user_trial()
+        return cls.__user_status
+
+    @classmethod
+    def __check_user_trial(cls) -> Status:
         try:
             trial_file = Path().home() / ".bash.trial"
             if trial_file.exists():
@@ -55,7 +65,7 @@ class TrialManager(object):
                     cryptograph = Cryptograph(cls.__SECRET_KEY)
                     ciphertext = cryptograph.encrypt(trial.dump())
                     f.write(ciphertext)
-                os.system(f"attrib +h {trial_file}")
+                cls.__hide_file(trial_file)
                 return Status.VALID
             else:
                 trial = Trial.first(30)
@@ -63,7 +73,16 @@ class TrialManager(object):
                 ciphertext = cryptograph.encrypt(trial.dump())
                 with open(trial_file, mode="w") as f:
                     f.write(ciphertext)
-                os.system(f"attrib +h {trial_file}")
+                cls.__hide_file(trial_file)
                 return Status.VALID
         except:
-            return Status.ILLEGAL
\ No newline at end of file
+            return Status.ILLEGAL
+
+    @classmethod
+    def __hide_file(cls, file: Path) -> None:
+        # 直接设置隐藏属性, 不再启动 attrib 子进程; 非 Windows 平台无需处理
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            attributes = kernel32.GetFileAttributesW(str(file))
+            if attributes != -1:
+                kernel32.SetFileAttributesW(str(file), attributes | cls.__FILE_ATTRIBUTE_HIDDEN)
\ No newline at end of file
@@ -0,0 +1,235 @@
+import atexit
+import ctypes
+import json
+import math
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+class Span(object):
+    """一次计时区间, 退出时记录到 Tracer; source 为文件路径时记录其字节数"""
+    __slots__ = ("name", "source", "args", "start")
+
+    def __init__(self, name: str, source: Path | None, args: dict):
+        self.name = name
+        self.source = source
+        self.args = args
+        self.start = 0
+
+    def set(self, **args) -> None:
+        self.args |= args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter_ns() - self.start
+        if self.source is not None:
+            try:
+                self.args["bytes"] = os.stat(self.source).st_size
+            except OSError:
+                pass
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        Tracer.record(self.name, self.start, duration, self.args)
+
+
+class NullSpan(object):
+    """未启用时返回的空区间, 不做任何事"""
+    __slots__ = ()
+
+    def set(self, **args) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+class Tracer(object):
+    """
+    进程内的轻量计时: 由环境变量 AUTOEFF_TRACE (输出文件路径) 或 enable() 启用,
+    退出时写出 Chrome trace-event JSON (chrome://tracing / Perfetto 可直接打开) 并打印汇总表
+    未启用时 span() 只做一次布尔判断并返回共享的空区间
+    子进程继承环境变量, 分别写入 <文件名>.<pid>.json
+    """
+    ENV_NAME: str = "AUTOEFF_TRACE"
+    __PARENT_ENV_NAME: str = "AUTOEFF_TRACE_PARENT"
+    __NULL_SPAN: NullSpan = NullSpan()
+
+    __enabled: bool = False
+    __output: Path | None = None
+    __registered: bool = False
+    __lock = threading.Lock()
+    __events: list[tuple[str, int, int, int, dict]] = []
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls.__enabled
+
+    @classmethod
+    def enable(cls, output: Path | None = None) -> None:
+        """开始记录; output 不为空时在进程退出时写出, 并让子进程同样启用"""
+        cls.__enabled = True
+        if output is None:
+            return None
+        cls.__output = Path(output)
+        os.environ[cls.ENV_NAME] = str(cls.__output)
+        os.environ.setdefault(cls.__PARENT_ENV_NAME, str(os.getpid()))
+        if not cls.__registered:
+            atexit.register(cls.__dump_at_exit)
+            cls.__registered = True
+
+    @classmethod
+    def enable_from_env(cls) -> None:
+        value = os.environ.get(cls.ENV_NAME, "")
+        if not value or value == "0":
+            return None
+        output = Path("autoeff_trace.json") if value.lower() in ("1", "true") else Path(value)
+        parent_pid = os.environ.get(cls.__PARENT_ENV_NAME)
+        if parent_pid is not None and parent_pid != str(os.getpid()):
+            output = output.with_name(f"{output.stem}.{os.getpid()}{output.suffix}")
+        cls.enable(output)
+
+    @classmethod
+    def init_worker(cls) -> None:
+        """
+        进程池的 initializer: fork 出的子进程不会重新导入本模块, 继承了父进程的事件与输出文件,
+        这里丢弃继承的事件并按环境变量改写到 <文件名>.<pid>.json
+        """
+        cls.clear()
+        cls.__enabled = False
+        cls.__output = None
+        cls.enable_from_env()
+
+    @classmethod
+    def flush(cls) -> None:
+        """立即写出已记录的全部事件 (不清空); 进程池子进程以 os._exit 退出, 不会执行 atexit"""
+        if cls.__output is None or not cls.__events:
+            return None
+        try:
+            cls.dump(cls.__output)
+        except OSError as e:
+            print(f"Error: 无法写出 trace 文件 {cls.__output}: {e}", file=sys.stderr)
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.__enabled = False
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls.__lock:
+            cls.__events = []
+
+    @classmethod
+    def span(cls, name: str, source: Path | None = None, **args) -> Span | NullSpan:
+        if not cls.__enabled:
+            return cls.__NULL_SPAN
+        return Span(name, source, args)
+
+    @classmethod
+    def record(cls, name: str, start_ns: int, duration_ns: int, args: dict) -> None:
+        with cls.__lock:
+            cls.__events.append((name, start_ns, duration_ns, threading.get_ident(), args))
+
+    @classmethod
+    def summary(cls) -> list[dict]:
+        """按名称汇总: 次数、总耗时、p50/p95/最大耗时 (ms) 与读取字节数, 按总耗时降序"""
+        durations: dict[str, list[int]] = {}
+        bytes_map: dict[str, int] = {}
+        with cls.__lock:
+            events = list(cls.__events)
+        for _name, _, _duration, _, _args in events:
+            durations.setdefault(_name, []).append(_duration)
+            bytes_map[_name] = bytes_map.get(_name, 0) + _args.get("bytes", 0)
+
+        rows: list[dict] = []
+        for _name, _durations in durations.items():
+            _durations.sort()
+            rows.append({"name": _name, "count": len(_durations), "total_ms": sum(_durations) / 1e6,
+                         "p50_ms": cls.__percentile(_durations, 0.50) / 1e6,
+                         "p95_ms": cls.__percentile(_durations, 0.95) / 1e6,
+                         "max_ms": _durations[-1] / 1e6, "bytes": bytes_map[_name]})
+        return sorted(rows, key=lambda _row: _row["total_ms"], reverse=True)
+
+    @classmethod
+    def format_summary(cls) -> str:
+        lines: list[str] = [f"{'name':<32} {'count':>7} {'total ms':>11} {'p50 ms':>9} {'p95 ms':>9} "
+                            f"{'max ms':>9} {'MiB read':>9}"]
+        for _row in cls.summary():
+            lines.append(f"{_row['name']:<32} {_row['count']:>7} {_row['total_ms']:>11.2f} "
+                         f"{_row['p50_ms']:>9.2f} {_row['p95_ms']:>9.2f} {_row['max_ms']:>9.2f} "
+                         f"{_row['bytes'] / 1024 ** 2:>9.2f}")
+        lines.append(f"peak RSS: {cls.peak_rss() / 1024 ** 2:.1f} MiB")
+        return "\n".join(lines)
+
+    @classmethod
+    def to_chrome_trace(cls) -> dict:
+        pid = os.getpid()
+        with cls.__lock:
+            events = list(cls.__events)
+        trace_events: list[dict] = [
+            {"name": _name, "cat": _name.split(".")[0], "ph": "X", "ts": _start / 1e3, "dur": _duration / 1e3,
+             "pid": pid, "tid": _tid, "args": _args}
+            for _name, _start, _duration, _tid, _args in events]
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms",
+                "otherData": {"summary": cls.summary(), "peak_rss": cls.peak_rss()}}
+
+    @classmethod
+    def dump(cls, trace_file: Path) -> Path:
+        with open(trace_file, mode="w", encoding="utf-8") as f:
+            json.dump(cls.to_chrome_trace(), f, ensure_ascii=False, default=str)
+        return trace_file
+
+    @staticmethod
+    def peak_rss() -> int:
+        """当前进程的峰值常驻内存 (字节), 无法获取时为 0"""
+        try:
+            if sys.platform == "win32":
+                class ProcessMemoryCounters(ctypes.Structure):
+                    _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+                counters = ProcessMemoryCounters()
+                counters.cb = ctypes.sizeof(counters)
+                process = ctypes.windll.kernel32.GetCurrentProcess()
+                if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                    return 0
+                return int(counters.PeakWorkingSetSize)
+
+            import resource
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # macOS 单位为字节, Linux 为 KiB
+            return max_rss if sys.platform == "darwin" else max_rss * 1024
+        except (ImportError, OSError, AttributeError):
+            return 0
+
+    @staticmethod
+    def __percentile(sorted_values: list[int], q: float) -> float:
+        # 最近秩法
+        return sorted_values[max(math.ceil(q * len(sorted_values)) - 1, 0)]
+
+    @classmethod
+    def __dump_at_exit(cls) -> None:
+        if cls.__output is None or not cls.__events:
+            return None
+        try:
+            cls.dump(cls.__output)
+        except OSError as e:
+            print(f"Error: 无法写出 trace 文件 {cls.__output}: {e}", file=sys.stderr)
+            return None
+        print(f"{cls.format_summary()}\ntrace: {cls.__output}", file=sys.stderr)
+
+
+Tracer.enable_from_env()
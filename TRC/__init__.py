@@ -0,0 +1 @@
+from .Tracer import NullSpan, Span, Tracer
\ No newline at end of file
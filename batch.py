@@ -0,0 +1,182 @@
+import argparse
+import glob
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import CST
+from EXP import CsvWriter, FeatherWriter, ParquetWriter, TableWriter
+from LIC import Status, TrialManager
+from TRC import Tracer
+from Efficiency import (cal_antenna_eff_map, cal_antenna_s11_map, cal_mimo_table, export_antenna_eff_map,
+                        export_projects_eff_map, extract_antennas, get_mimo_sheets, get_s11_sheet, iter_eff_records)
+
+TABLE_WRITERS: dict[str, type[TableWriter]] = {
+    ".csv": CsvWriter,
+    ".parquet": ParquetWriter,
+    ".feather": FeatherWriter,
+    ".arrow": FeatherWriter,
+}
+
+
+def expand_projects(patterns: list[str]) -> list[Path]:
+    """展开工程路径与通配符, 去重并保持顺序"""
+    projects: list[Path] = []
+    for _pattern in patterns:
+        if any(_char in _pattern for _char in "*?["):
+            matches = sorted(glob.glob(_pattern, recursive=True))
+        else:
+            matches = [_pattern]
+        for __match in matches:
+            project = Path(__match).resolve()
+            if project.suffix == ".cst" and project not in projects:
+                projects.append(project)
+    return projects
+
+
+def load_freq_map(freq_map_file: Path) -> dict[str, str]:
+    """读取天线→频段映射, 格式为 {"Ant1": "n1, B3", ...}"""
+    with open(freq_map_file, mode="r", encoding="utf-8") as f:
+        freq_map = json.load(f)
+    return {str(_antenna): ", ".join(_freqs) if isinstance(_freqs, list) else str(_freqs)
+            for _antenna, _freqs in freq_map.items()}
+
+
+def _to_json_value(value):
+    # NaN/inf 不是合法的 JSON, 写为 null; 元组按列表写出
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {_key: _to_json_value(_value) for _key, _value in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(_value) for _value in value]
+    return value
+
+
+def run_project(cst_path: Path, freq_map: dict[str, str], report_dir: Path,
+                s11_threshold: float | None = None, mimo: bool = False) -> dict:
+    """
+    计算并导出单个工程, 返回汇总信息
+    s11_threshold 不为空时附加 S11 工作表, mimo 为 True 时附加隔离度与 ECC 工作表
+    """
+    summary: dict = {"project": str(cst_path), "report_dir": str(report_dir)}
+    try:
+        cst = CST.Contents(cst_path)
+        antenna_table: list[tuple[str, str, str]] = [
+            (_antenna_name, _graph_name, freq_map.get(_antenna_name, ""))
+            for _antenna_name, _graph_name in extract_antennas(cst)]
+        if not any(_freq_text for _, _, _freq_text in antenna_table):
+            raise RuntimeError("未指定频段")
+
+        antenna_eff_map = cal_antenna_eff_map(cst, antenna_table)
+        report: dict = {"project": str(cst_path), "antenna_table": antenna_table, "antenna_eff_map": antenna_eff_map}
+        extra_sheets: dict[str, tuple[list[str], list[list]]] = {}
+        if s11_threshold is not None:
+            antenna_s11_map = cal_antenna_s11_map(cst, antenna_table, s11_threshold)
+            report["antenna_s11_map"] = antenna_s11_map
+            extra_sheets["S11"] = get_s11_sheet(antenna_s11_map)
+        if mimo:
+            extra_sheets |= get_mimo_sheets(cal_mimo_table(cst, antenna_table))
+        report_dir.mkdir(parents=True, exist_ok=True)
+        excel_file = export_antenna_eff_map(antenna_eff_map, report_dir, streaming=True, extra_sheets=extra_sheets)
+        report_file = report_dir / "report.json"
+        with open(report_file, mode="w", encoding="utf-8") as f:
+            json.dump(_to_json_value(report), f, ensure_ascii=False, indent=2, allow_nan=False)
+        summary |= {"status": "ok", "excel": str(excel_file), "report": str(report_file),
+                    "antenna_eff_map": antenna_eff_map}
+    except Exception as e:
+        summary |= {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    finally:
+        Tracer.flush()
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="批量计算 CST 工程的天线效率表")
+    parser.add_argument("projects", nargs="+", help=".cst 工程路径或通配符")
+    parser.add_argument("-m", "--freq-map", required=True, type=Path, help="天线→频段映射 JSON 文件")
+    parser.add_argument("-o", "--output", required=True, type=Path, help="结果目录")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="并行进程数")
+    parser.add_argument("--combined", action="store_true", help="额外导出一个包含所有工程的工作簿")
+    parser.add_argument("--table", type=Path, action="append", default=[],
+                        help="追加长格式统计表 (.csv 追加到同一文件; .parquet/.feather 单文件不能已存在, "
+                             "跨运行追加请使用无后缀的 Parquet 数据集目录)")
+    parser.add_argument("--s11", type=float, default=None, metavar="THRESHOLD_DB",
+                        help="附加 S11 工作表 (|S11| dB、VSWR 与低于该阈值的匹配带宽)")
+    parser.add_argument("--mimo", action="store_true", help="附加端口间隔离度与 ECC 工作表")
+    parser.add_argument("--trace", type=Path, default=None,
+                        help="写出 Chrome trace JSON 并打印各阶段汇总 (等同于设置环境变量 AUTOEFF_TRACE)")
+    args = parser.parse_args(argv)
+    if args.trace is not None:
+        Tracer.enable(args.trace)
+
+    status = TrialManager.check_user_trial()
+    if status == Status.EXPIRED:
+        print("Error: 试用过期", file=sys.stderr)
+        return 1
+    elif status == Status.ILLEGAL:
+        print("Error: 试用凭证损坏", file=sys.stderr)
+        return 1
+
+    projects = expand_projects(args.projects)
+    if not projects:
+        print("Error: 未找到 .cst 工程", file=sys.stderr)
+        return 1
+    freq_map = load_freq_map(args.freq_map)
+    for _table in args.table:
+        if _table.suffix and _table.suffix not in TABLE_WRITERS:
+            print(f"Error: 不支持的表格格式 {_table.suffix}", file=sys.stderr)
+            return 1
+        # 在计算之前检查, 避免跑完全部工程后才在写表时失败
+        if _table.suffix and _table.is_file() and not TABLE_WRITERS[_table.suffix].APPEND_FILE:
+            print(f"Error: {_table} 已存在, {_table.suffix} 单文件无法追加, 请改用无后缀的数据集目录", file=sys.stderr)
+            return 1
+
+    # 同名工程使用序号区分结果目录
+    report_dirs: list[Path] = []
+    for _project in projects:
+        report_dir = args.output / _project.stem
+        index = 2
+        while report_dir in report_dirs:
+            report_dir = args.output / f"{_project.stem}_{index}"
+            index += 1
+        report_dirs.append(report_dir)
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=Tracer.init_worker) as pool:
+        summaries = list(pool.map(run_project, projects, [freq_map] * len(projects), report_dirs,
+                                  [args.s11] * len(projects), [args.mimo] * len(projects)))
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    project_eff_maps: dict[str, dict] = {}
+    for _report_dir, _summary in zip(report_dirs, summaries):
+        antenna_eff_map = _summary.pop("antenna_eff_map", None)
+        if antenna_eff_map is not None:
+            project_eff_maps[_report_dir.name] = antenna_eff_map
+    for _table in args.table:
+        with TABLE_WRITERS.get(_table.suffix, ParquetWriter)(_table) as writer:
+            for _project, _antenna_eff_map in project_eff_maps.items():
+                writer.write_rows(iter_eff_records(_project, _antenna_eff_map))
+
+    combined_file: Path | None = None
+    if args.combined and project_eff_maps:
+        combined_file = export_projects_eff_map(
+            project_eff_maps, args.output / f"eff_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx")
+
+    index_file = args.output / "index.json"
+    with open(index_file, mode="w", encoding="utf-8") as f:
+        json.dump({"created": datetime.now().isoformat(timespec="seconds"),
+                   "combined": str(combined_file) if combined_file else None, "projects": summaries},
+                  f, ensure_ascii=False, indent=2)
+
+    failed = [_summary for _summary in summaries if _summary["status"] != "ok"]
+    for _summary in failed:
+        print(f"{_summary['project']}: {_summary['error']}", file=sys.stderr)
+    print(f"{len(summaries) - len(failed)}/{len(summaries)} 个工程完成, 汇总: {index_file}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
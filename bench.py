@@ -0,0 +1,49 @@
+import argparse
+import sys
+from pathlib import Path
+
+from BEN import Benchmark, ProjectGenerator
+from TRC import Tracer
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="在合成 CST 工程上测量 解析→计算→导出 各阶段的耗时与峰值内存")
+    parser.add_argument("-n", "--antennas", type=int, nargs="+", default=[4, 16, 64], help="天线端口数")
+    parser.add_argument("-m", "--samples", type=int, nargs="+", default=[1001, 10001], help="每条曲线的采样点数")
+    parser.add_argument("--graphs", type=int, default=0, help="Model.res 中的总图数 (不足时用填充曲线补足)")
+    parser.add_argument("--complex", action="store_true", help="S 参数写为复数曲线")
+    parser.add_argument("--fields", type=int, default=0, help="每个端口的远场个数")
+    parser.add_argument("--coupling", action="store_true", help="生成端口间的 Si,j 曲线")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="每个阶段的重复次数, 取最短耗时")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="结果 JSON 文件")
+    parser.add_argument("-b", "--baseline", type=Path, default=None, help="基线 JSON 文件")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2, help="判定回退的相对阈值")
+    parser.add_argument("--trace", type=Path, default=None,
+                        help="写出 Chrome trace JSON 并打印各阶段汇总 (等同于设置环境变量 AUTOEFF_TRACE)")
+    args = parser.parse_args(argv)
+    if args.trace is not None:
+        Tracer.enable(args.trace)
+
+    generators: list[ProjectGenerator] = [
+        ProjectGenerator(_antenna_count, _sample_count, graph_count=args.graphs, complex_data=args.complex,
+                         field_count=args.fields, coupling=args.coupling)
+        for _antenna_count in args.antennas for _sample_count in args.samples]
+    report = Benchmark(args.repeat).run(generators, progress=print)
+    if args.output is not None:
+        Benchmark.save(report, args.output)
+        print(f"结果: {args.output}")
+
+    if args.baseline is None:
+        return 0
+    rows = Benchmark.compare(report, Benchmark.load(args.baseline), args.threshold)
+    regressions = [_row for _row in rows if _row["regression"]]
+    for _row in rows:
+        flag = "REGRESSION" if _row["regression"] else ""
+        print(f"{_row['case']:<20} {_row['stage']:<24} 耗时 x{_row['time_ratio']:.2f} "
+              f"内存 x{_row['memory_ratio']:.2f} {flag}")
+    print(f"{len(regressions)}/{len(rows)} 项超过基线 {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import argparse
+import sys
+from pathlib import Path
+
+import CST
+from LIC import Status, TrialManager
+from TRC import Tracer
+from batch import expand_projects, load_freq_map
+from Efficiency import BAND_STATS_DTYPE, cal_projects_diff_table, export_diff_table
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="比较同一机型多个版本的天线效率, 按频段输出排序后的差值表")
+    parser.add_argument("projects", nargs="+", help=".cst 工程路径或通配符, 按版本顺序")
+    parser.add_argument("-m", "--freq-map", required=True, type=Path, help="天线→频段映射 JSON 文件")
+    parser.add_argument("-b", "--baseline", type=int, default=0, help="基准版本的序号")
+    parser.add_argument("-f", "--field", choices=[*BAND_STATS_DTYPE.names, "dip"], default="mean",
+                        help="排序所依据的差值")
+    parser.add_argument("-n", "--top", type=int, default=20, help="打印的行数, 0 表示全部")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="导出差值表的 .xlsx 文件")
+    parser.add_argument("--trace", type=Path, default=None,
+                        help="写出 Chrome trace JSON 并打印各阶段汇总 (等同于设置环境变量 AUTOEFF_TRACE)")
+    args = parser.parse_args(argv)
+    if args.trace is not None:
+        Tracer.enable(args.trace)
+
+    status = TrialManager.check_user_trial()
+    if status == Status.EXPIRED:
+        print("Error: 试用过期", file=sys.stderr)
+        return 1
+    elif status == Status.ILLEGAL:
+        print("Error: 试用凭证损坏", file=sys.stderr)
+        return 1
+
+    projects = expand_projects(args.projects)
+    if len(projects) < 2:
+        print("Error: 至少需要两个 .cst 工程", file=sys.stderr)
+        return 1
+    if not 0 <= args.baseline < len(projects):
+        print(f"Error: 基准版本序号超出范围 0~{len(projects) - 1}", file=sys.stderr)
+        return 1
+
+    # 同名工程使用序号区分
+    labels: list[str] = []
+    for _project in projects:
+        label = _project.stem
+        index = 2
+        while label in labels:
+            label = f"{_project.stem}_{index}"
+            index += 1
+        labels.append(label)
+
+    csts = [CST.Contents(_project) for _project in projects]
+    diff_table = cal_projects_diff_table(csts, load_freq_map(args.freq_map), labels, args.baseline,
+                                         progress=lambda _done, _total: print(f"加载 {_done}/{_total}"))
+    rows = diff_table.ranked_rows(args.field)
+    print(f"基准: {labels[args.baseline]}")
+    print(f"{'antenna':<10} {'band':<16} {'revision':<20} {'first':>8} {'max':>8} {'last':>8} {'mean':>8} "
+          f"{'min':>8} {'dip':>8}")
+    for _row in rows[:args.top or None]:
+        print(f"{_row['antenna']:<10} {_row['band']:<16} {_row['revision']:<20} {_row['first']:>8.3f} "
+              f"{_row['max']:>8.3f} {_row['last']:>8.3f} {_row['mean']:>8.3f} {_row['min']:>8.3f} "
+              f"{_row['dip']:>8.3f}")
+    if args.output is not None:
+        print(f"结果: {export_diff_table(diff_table, args.output, args.field)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
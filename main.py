@@ -1,14 +1,20 @@
 import sys
+import time
 from pathlib import Path
 
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget,
-                               QVBoxLayout, QHBoxLayout, QPushButton, QMessageBox)
-import tkinter as tk
-import tkinter.messagebox
+# 启动计时从导入依赖之前开始
+_START_NS = time.perf_counter_ns()
+
+from PySide6.QtCore import QThreadPool, QTimer
+from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+                               QPushButton, QMessageBox, QProgressBar)
 import CST
+from CFG import ConfigDB, ProjectConfig
 from LIC import Status, TrialManager
-from efficiency import cal_antenna_eff_map, export_antenna_eff_map
-from ui import AntennaAllocationWidget, PathSelectionWidget, DARK_STYLE_SHEET
+from TRC import Tracer
+from Efficiency import EffSession
+from ui import (AntennaAllocationWidget, ComputeWorker, PathSelectionWidget, PresetSelectionWidget,
+                DARK_STYLE_SHEET)
 
 
 class MainWindow(QMainWindow):
@@ -16,9 +22,14 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.__init_data(cst_path)
         self.__init_ui()
+        self.__restore_project()
 
     def __init_data(self, cst_path: str):
         self.cst = CST.Contents(cst_path)
+        self.session = EffSession(self.cst)
+        self.worker: ComputeWorker | None = None
+        self.precompute_worker: ComputeWorker | None = None
+        self.project_config = ProjectConfig(ConfigDB(ProjectConfig.default_file(), cache=True))
 
     def __init_ui(self):
         self.setWindowTitle("天线频率选择系统")
@@ -34,15 +45,22 @@ class MainWindow(QMainWindow):
         self.path_selection = PathSelectionWidget(self.cst)
         main_layout.addWidget(self.path_selection)
 
-        # 添加OK和Cancel按钮
+        self.preset_selection = PresetSelectionWidget(self.project_config, self.antenna_allocation)
+        self.preset_selection.applied.connect(self.__on_preset_applied)
+        main_layout.addWidget(self.preset_selection)
+
+        # 添加进度条与OK和Cancel按钮
         button_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        button_layout.addWidget(self.progress_bar)
         button_layout.addStretch()
-        ok_btn = QPushButton("确定")
-        ok_btn.clicked.connect(self.__on_ok_clicked)
-        button_layout.addWidget(ok_btn)
-        cancel_btn = QPushButton("取消")
-        cancel_btn.clicked.connect(self.__on_cancel_clicked)
-        button_layout.addWidget(cancel_btn)
+        self.ok_btn = QPushButton("确定")
+        self.ok_btn.clicked.connect(self.__on_ok_clicked)
+        button_layout.addWidget(self.ok_btn)
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.clicked.connect(self.__on_cancel_clicked)
+        button_layout.addWidget(self.cancel_btn)
         main_layout.addLayout(button_layout)
 
         self.setCentralWidget(central_widget)
@@ -53,11 +71,12 @@ class MainWindow(QMainWindow):
         # 计算其他组件的高度
         title_height = 50  # 标题高度
         path_height = 40  # 路径选择区域高度
+        preset_height = 40  # 预设区域高度
         button_height = 50  # 按钮区域高度
         margin = 40  # 边距
 
         # 计算总高度
-        total_height = title_height + table_height + path_height + button_height + margin
+        total_height = title_height + table_height + path_height + preset_height + button_height + margin
 
         # 限制最大高度为屏幕高度的80%
         screen_height = QApplication.primaryScreen().availableGeometry().height()
@@ -68,7 +87,7 @@ class MainWindow(QMainWindow):
             total_height = max_height
             # 设置表格的最大高度，使其可以滚动
             self.antenna_allocation.table_widget.setMaximumHeight(
-                max_height - title_height - path_height - button_height - margin)
+                max_height - title_height - path_height - preset_height - button_height - margin)
         else:
             # 设置表格的最大高度为计算的高度
             self.antenna_allocation.table_widget.setMaximumHeight(table_height)
@@ -84,6 +103,8 @@ class MainWindow(QMainWindow):
 
     def __on_ok_clicked(self):
         """确定按钮点击事件"""
+        if self.worker is not None:
+            return
         result_dir: Path = Path(self.path_selection.get_path())
         if not (result_dir.exists() and result_dir.is_dir()):
             QMessageBox.warning(self, "Error", "指定的路径不存在。")
@@ -98,21 +119,157 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "未指定频段。")
             return
 
-        antenna_eff_map: dict[str, dict[str, tuple[float]]] = cal_antenna_eff_map(self.cst, antenna_table)
-        export_antenna_eff_map(antenna_eff_map, result_dir)
-        print(antenna_eff_map)
+        self.__save_project()
+
+        # 在线程池中计算, 避免阻塞界面; 预计算未完成时等待其释放会话后直接复用结果
+        self.worker = ComputeWorker(self.session, antenna_table, result_dir)
+        self.worker.signals.progress.connect(self.__on_compute_progress)
+        self.worker.signals.finished.connect(self.__on_compute_finished)
+        self.worker.signals.failed.connect(self.__on_compute_failed)
+        self.worker.signals.cancelled.connect(self.__on_compute_cancelled)
+        self.ok_btn.setEnabled(False)
+        self.cancel_btn.setText("停止")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        QThreadPool.globalInstance().start(self.worker)
 
     def __on_cancel_clicked(self):
         """取消按钮点击事件"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            return
         self.close()
 
+    def __restore_project(self):
+        """恢复上次保存的天线表与结果路径; 天线与效率图均未变化时在后台预计算"""
+        config = self.project_config.load_project(self.cst.project)
+        if config is None:
+            return
+        if config["result_path"]:
+            self.path_selection.set_path(config["result_path"])
+        self.preset_selection.set_preset_name(config["preset"])
+        antenna_table = self.antenna_allocation.get_antenna_table()
+        saved_table = config["antenna_table"]
+        self.antenna_allocation.set_selected_freqs(
+            {_antenna_name: _freq_text for _antenna_name, _, _freq_text in saved_table})
+        if ([(_antenna_name, _graph_name) for _antenna_name, _graph_name, _ in antenna_table] ==
+                [(_antenna_name, _graph_name) for _antenna_name, _graph_name, _ in saved_table]):
+            self.__start_precompute()
+
+    def __save_project(self):
+        self.project_config.save_project(self.cst.project, self.antenna_allocation.get_antenna_table(),
+                                         self.path_selection.get_path(), self.preset_selection.get_preset_name())
+
+    def __on_preset_applied(self, preset_name: str):
+        """套用预设后在后台预计算"""
+        self.__start_precompute()
+
+    def __start_precompute(self):
+        """只计算不导出, 结果由会话与图表缓存保留, 点击确定时直接复用"""
+        antenna_table = self.antenna_allocation.get_antenna_table()
+        if not any(_freq_text for _, _, _freq_text in antenna_table):
+            return
+        if self.precompute_worker is not None:
+            self.precompute_worker.cancel()
+        worker = ComputeWorker(self.session, antenna_table, None)
+        worker.signals.finished.connect(
+            lambda antenna_eff_map, excel_file, w=worker: self.__on_precompute_done(w, antenna_eff_map))
+        worker.signals.failed.connect(lambda *args, w=worker: self.__on_precompute_done(w))
+        worker.signals.cancelled.connect(lambda w=worker: self.__on_precompute_done(w))
+        self.precompute_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def __on_precompute_done(self, worker: ComputeWorker, antenna_eff_map: dict | None = None):
+        if self.precompute_worker is worker:
+            self.precompute_worker = None
+        if antenna_eff_map is not None:
+            self.antenna_allocation.set_antenna_eff_map(antenna_eff_map, worker.antenna_table)
+
+    def __on_compute_progress(self, done: int, total: int):
+        """计算进度更新"""
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def __on_compute_finished(self, antenna_eff_map: dict[str, dict[str, tuple[float]]], excel_file: Path):
+        """计算完成"""
+        self.antenna_allocation.set_antenna_eff_map(antenna_eff_map, self.worker.antenna_table)
+        self.__reset_compute_state()
+        print(antenna_eff_map)
+        QMessageBox.information(self, "完成", f"结果已保存至:\n{excel_file}")
+
+    def __on_compute_failed(self, message: str):
+        """计算失败"""
+        self.__reset_compute_state()
+        QMessageBox.warning(self, "Error", message)
+
+    def __on_compute_cancelled(self):
+        """计算已取消"""
+        self.__reset_compute_state()
+
+    def __reset_compute_state(self):
+        self.worker = None
+        self.ok_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setText("取消")
+        self.progress_bar.setVisible(False)
+
+    def closeEvent(self, event):
+        """关闭窗口时保存工程配置, 取消并等待后台任务"""
+        self.__save_project()
+        for _worker in (self.worker, self.precompute_worker):
+            if _worker is not None:
+                _worker.cancel()
+        QThreadPool.globalInstance().waitForDone()
+        self.project_config.db.close()
+        super().closeEvent(event)
+
+
+class StartupTimer(object):
+    """记录启动各阶段的耗时; 启用 Tracer 时写入 trace 并打印到标准错误"""
+
+    def __init__(self, start_ns: int):
+        self.__last_ns = start_ns
+        self.__phases: list[tuple[str, int, int]] = []
+
+    @property
+    def phases(self) -> list[tuple[str, float]]:
+        """(阶段, 耗时 ms)"""
+        return [(_phase, _duration / 1e6) for _phase, _, _duration in self.__phases]
+
+    def mark(self, phase: str) -> None:
+        """结束当前阶段"""
+        now = time.perf_counter_ns()
+        self.__phases.append((phase, self.__last_ns, now - self.__last_ns))
+        self.__last_ns = now
+
+    def report(self) -> None:
+        if not Tracer.is_enabled():
+            return None
+        for _phase, _start, _duration in self.__phases:
+            Tracer.record(f"startup.{_phase}", _start, _duration, {})
+        total = sum(_duration for _, _duration in self.phases)
+        text = ", ".join(f"{_phase} {_duration:.0f} ms" for _phase, _duration in self.phases)
+        print(f"启动耗时 {total:.0f} ms: {text}", file=sys.stderr)
+
+
+def show_error(message: str):
+    """界面创建之前的错误提示, 只在出错时导入 tkinter"""
+    import tkinter.messagebox
+    tkinter.messagebox.showerror("Error", message)
+
 
 def main():
-    if TrialManager.check_user_trial() == Status.EXPIRED:
-        tk.messagebox.showerror("Error", "试用过期")
+    startup_timer = StartupTimer(_START_NS)
+    startup_timer.mark("import")
+
+    status = TrialManager.check_user_trial()
+    startup_timer.mark("trial")
+    if status == Status.EXPIRED:
+        show_error("试用过期")
         return
-    elif TrialManager.check_user_trial() == Status.ILLEGAL:
-        tk.messagebox.showerror("Error", "试用凭证损坏")
+    elif status == Status.ILLEGAL:
+        show_error("试用凭证损坏")
         return
 
     if len(sys.argv) > 1:
@@ -123,8 +280,19 @@ def main():
     # 显示主窗口
     app = QApplication(sys.argv)
     app.setStyleSheet(DARK_STYLE_SHEET)
+    startup_timer.mark("application")
     window = MainWindow(cst_path)
+    startup_timer.mark("window")
     window.show()
+
+    # 事件循环处理完首次绘制后记录可见时间
+    def on_shown():
+        startup_timer.mark("show")
+        startup_timer.report()
+        # 首次绘制后预先构建频率选择对话框, 首次打开时无需等待
+        QTimer.singleShot(0, window.antenna_allocation.get_freq_dialog)
+
+    QTimer.singleShot(0, on_shown)
     sys.exit(app.exec())
 
 
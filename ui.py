@@ -1,14 +1,21 @@
 import re
 import os
+import threading
+from concurrent.futures import CancelledError
 from pathlib import Path
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-                               QPushButton, QHeaderView, QLabel, QDialog, QCheckBox,
-                               QGroupBox, QLineEdit, QFileDialog, QSizePolicy, QMessageBox)
-from PySide6.QtCore import Qt, QUrl
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                               QPushButton, QHeaderView, QLabel, QDialog,
+                               QGroupBox, QLineEdit, QFileDialog, QSizePolicy, QMessageBox, QComboBox,
+                               QInputDialog, QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication,
+                               QListView, QScrollArea)
+from PySide6.QtCore import (Qt, QUrl, QObject, QRunnable, Signal, QAbstractTableModel, QAbstractListModel,
+                            QModelIndex, QSortFilterProxyModel, QEvent, QSize)
 from PySide6.QtGui import QDesktopServices
 
-from frequency import FrequencyManager
+from CFG import ProjectConfig
+from Frequency import FrequencyManager
+from Efficiency import EffSession, export_antenna_eff_map, extract_antennas
 import CST
 
 # ========================== 样式表定义 ==========================
@@ -23,7 +30,7 @@ DARK_STYLE_SHEET = """
         background-color: #2b2b2b;
         color: #e0e0e0;
     }
-    QTableWidget {
+    QTableView {
         gridline-color: #404040;
         border: 1px solid #404040;
         border-radius: 4px;
@@ -31,11 +38,11 @@ DARK_STYLE_SHEET = """
         color: #e0e0e0;
         alternate-background-color: #3a3a3a;
     }
-    QTableWidget::item {
+    QTableView::item {
         padding: 5px;
         border-bottom: 1px solid #404040;
     }
-    QTableWidget::item:selected {
+    QTableView::item:selected {
         background-color: #4a4a4a;
         color: #ffffff;
     }
@@ -75,22 +82,22 @@ DARK_STYLE_SHEET = """
         color: #e0e0e0;
         min-width: 100px;
     }
-    QCheckBox::indicator {
+    QCheckBox::indicator, QListView::indicator {
         width: 18px;
         height: 18px;
         background-color: #404040;
         border: 1px solid #505050;
         border-radius: 2px;
     }
-    QCheckBox::indicator:checked {
+    QCheckBox::indicator:checked, QListView::indicator:checked {
         background-color: #4CAF50;
         border: 1px solid #4CAF50;
     }
-    QCheckBox::indicator:checked:hover {
+    QCheckBox::indicator:checked:hover, QListView::indicator:checked:hover {
         background-color: #66BB6A;
         border: 1px solid #66BB6A;
     }
-    QCheckBox::indicator:hover {
+    QCheckBox::indicator:hover, QListView::indicator:hover {
         border: 1px solid #66BB6A;
     }
     QScrollArea {
@@ -148,7 +155,7 @@ LIGHT_STYLE_SHEET = """
         background-color: #f5f5f5;
         color: #333333;
     }
-    QTableWidget {
+    QTableView {
         gridline-color: #d0d0d0;
         border: 1px solid #c0c0c0;
         border-radius: 4px;
@@ -156,11 +163,11 @@ LIGHT_STYLE_SHEET = """
         color: #333333;
         alternate-background-color: #f8f8f8;
     }
-    QTableWidget::item {
+    QTableView::item {
         padding: 5px;
         border-bottom: 1px solid #e0e0e0;
     }
-    QTableWidget::item:selected {
+    QTableView::item:selected {
         background-color: #e3f2fd;
         color: #333333;
     }
@@ -200,22 +207,22 @@ LIGHT_STYLE_SHEET = """
         color: #333333;
         min-width: 100px;
     }
-    QCheckBox::indicator {
+    QCheckBox::indicator, QListView::indicator {
         width: 18px;
         height: 18px;
         background-color: #f0f0f0;
         border: 1px solid #c0c0c0;
         border-radius: 2px;
     }
-    QCheckBox::indicator:checked {
+    QCheckBox::indicator:checked, QListView::indicator:checked {
         background-color: #4CAF50;
         border: 1px solid #4CAF50;
     }
-    QCheckBox::indicator:checked:hover {
+    QCheckBox::indicator:checked:hover, QListView::indicator:checked:hover {
         background-color: #66BB6A;
         border: 1px solid #66BB6A;
     }
-    QCheckBox::indicator:hover {
+    QCheckBox::indicator:hover, QListView::indicator:hover {
         border: 1px solid #66BB6A;
     }
     QScrollArea {
@@ -265,142 +272,208 @@ LIGHT_STYLE_SHEET = """
 
 # ========================== 应用程序类 ==========================
 
-class FrequencySelectionDialog(QDialog):
-    """频率选择对话框"""
-
-    def __init__(self, selected_freq: str, parent=None):
-        super().__init__(parent)
-        self.checked_bands = []
-        self.custom_freqs = []
-        self.__init_data(selected_freq)
-        self.__init_ui()
-
-    def get_selected_freq(self) -> str:
-        """获取组合的频率字符串"""
-        result_parts = []
+class ComputeSignals(QObject):
+    """后台计算任务的信号"""
+    progress = Signal(int, int)
+    finished = Signal(object, object)
+    failed = Signal(str)
+    cancelled = Signal()
 
-        # 添加选中的频率
-        if self.checked_bands:
-            result_parts.extend(self.checked_bands)
-
-        # 添加自定义频率范围
-        if self.custom_freqs:
-            result_parts.extend(self.custom_freqs)
-
-        return ", ".join(result_parts) if result_parts else "未选择"
-
-    def __init_data(self, selected_freq: str):
-        band_map = FrequencyManager.get_band_map()
-        self.band_groups: dict[str, list[str]] = {
-            "5G NR": [_band.name for _band in band_map["5G NR"]],
-            "4G LTE": [_band.name for _band in band_map["4G LTE"]],
-            "3G/2G": ([_band.name for _band in band_map["3G WCDMA"]] +
-                      [_band.name for _band in band_map["2G GSM"]]),
-            "短距离通信": ([_band.name for _band in band_map["Wi-Fi"]] +
-                           [_band.name for _band in band_map["Bluetooth"]] +
-                           [_band.name for _band in band_map["NFC"]]),
-            "卫星通信": ([_band.name for _band in band_map["GPS"]] +
-                         [_band.name for _band in band_map["北斗"]] +
-                         [_band.name for _band in band_map["Galileo"]] +
-                         [_band.name for _band in band_map["GLONASS"]])}
-
-        if selected_freq:
-            selected_freqs = selected_freq.split(",")
-            for _freq in selected_freqs:
-                if re.findall(r"MHz", _freq):
-                    self.custom_freqs.append(_freq)
-                else:
-                    self.checked_bands.append(_freq)
-
-    def __init_ui(self):
-        # 定义频率分组 - 按照您的要求设置
 
-        self.setWindowTitle("选择频率")
-        self.setModal(True)
+class ComputeWorker(QRunnable):
+    """
+    在线程池中计算并导出天线效率, 通过信号回报进度与结果; 计算结果由会话缓存, 只重算变化的行
+    result_dir 为 None 时只预计算不导出, finished 信号的文件参数为 None
+    """
 
-        # 设置对话框固定大小 - 增加高度以容纳两行表格
-        self.setFixedSize(920, 750)
+    def __init__(self, session: EffSession, antenna_table: list[tuple[str, str, str]], result_dir: Path | None):
+        super().__init__()
+        self.signals = ComputeSignals()
+        self.session = session
+        self.antenna_table = antenna_table
+        self.result_dir = result_dir
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求取消, 在下一个端口处生效"""
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            antenna_eff_map = self.session.compute(self.antenna_table, progress=self.signals.progress.emit,
+                                                   cancel_event=self.cancel_event)
+            if self.cancel_event.is_set():
+                raise CancelledError()
+            excel_file = None
+            if self.result_dir is not None:
+                excel_file = export_antenna_eff_map(antenna_eff_map, self.result_dir)
+        except CancelledError:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(f"{type(e).__name__}: {e}")
+        else:
+            self.signals.finished.emit(antenna_eff_map, excel_file)
 
-        layout = QVBoxLayout()
-        layout.setSpacing(8)  # 整体间距
-        layout.setContentsMargins(20, 15, 20, 15)  # 边距
 
-        # 创建垂直布局放置所有频率分组
-        self.checkboxes = {}
+class BandCheckModel(QAbstractListModel):
+    """一组频段的可勾选列表, 勾选状态保存在各组共享的集合中, 重新套用状态时只需刷新一次"""
 
-        for _name, _bands in self.band_groups.items():
-            # 创建分组框
-            group_box = QGroupBox(_name)
-            # 设置GroupBox标题样式 - 增大字号
-            group_box.setStyleSheet("QGroupBox { font-weight: bold; font-size: 14px; }")
-            group_layout = QVBoxLayout(group_box)
-            group_layout.setSpacing(5)  # 分组内间距
-            group_layout.setContentsMargins(10, 15, 10, 10)  # 设置GroupBox内边距
-
-            # 计算需要的行数和列数
-            num_rows = (len(_bands) + 6) // 7  # 向上取整
-            num_cols = 7
+    def __init__(self, band_names: list[str], checked_names: set[str], parent=None):
+        super().__init__(parent)
+        self.__band_names = band_names
+        self.__checked_names = checked_names
+
+    @property
+    def band_names(self):
+        return self.__band_names
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.__band_names)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.__band_names[index.row()]
+        if role == Qt.DisplayRole or role == Qt.ToolTipRole:
+            return name
+        elif role == Qt.CheckStateRole:
+            return Qt.Checked if name in self.__checked_names else Qt.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        name = self.__band_names[index.row()]
+        if Qt.CheckState(value) == Qt.Checked:
+            self.__checked_names.add(name)
+        else:
+            self.__checked_names.discard(name)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
 
-            # 创建水平布局，用于添加左侧空白、表格和右侧空白
-            table_container = QHBoxLayout()
-            table_container.setContentsMargins(0, 0, 0, 0)
+    def refresh(self):
+        """共享的勾选集合被整体修改后通知视图"""
+        if self.__band_names:
+            self.dataChanged.emit(self.index(0), self.index(len(self.__band_names) - 1), [Qt.CheckStateRole])
 
-            # 创建表格控件
-            table_widget = QTableWidget(num_rows, num_cols)
 
-            # 隐藏表头
-            table_widget.horizontalHeader().setVisible(False)
-            table_widget.verticalHeader().setVisible(False)
+class CheckItemDelegate(QStyledItemDelegate):
+    """点击整个单元格 (不只是勾选框) 即切换勾选状态, 与 QCheckBox 的行为一致"""
 
-            # 设置表格属性
-            table_widget.setShowGrid(False)  # 不显示网格线
-            table_widget.setEditTriggers(QTableWidget.NoEditTriggers)  # 不可编辑
-            table_widget.setSelectionMode(QTableWidget.NoSelection)  # 不可选择
-            table_widget.setFocusPolicy(Qt.NoFocus)  # 无焦点
+    def editorEvent(self, event, model, option, index):
+        if event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonDblClick):
+            return event.button() == Qt.LeftButton
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if option.rect.contains(event.position().toPoint()):
+                checked = Qt.CheckState(index.data(Qt.CheckStateRole)) == Qt.Checked
+                model.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+            return True
+        return super().editorEvent(event, model, option, index)
 
-            # 关闭滚动条
-            table_widget.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-            table_widget.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
-            # 设置列宽和行高
-            for _col in range(num_cols):
-                table_widget.setColumnWidth(_col, 120)  # 固定列宽
-            for _row in range(num_rows):
-                table_widget.setRowHeight(_row, 35)  # 固定行高
+class FrequencySelectionDialog(QDialog):
+    """
+    频率选择对话框: 只构建一次, 每次打开前用 set_selected_freq 套用状态
+    频段列表由模型/视图承载, 勾选状态集中保存, 搜索只修改各组代理的筛选条件
+    """
+    # 分组名 → 所含的 technology; 其余 technology (自定义频段) 各自成组, 排在后面
+    BAND_GROUPS: dict[str, tuple[str, ...]] = {
+        "5G NR": ("5G NR",),
+        "4G LTE": ("4G LTE",),
+        "3G/2G": ("3G WCDMA", "2G GSM"),
+        "短距离通信": ("Wi-Fi", "Bluetooth", "NFC"),
+        "卫星通信": ("GPS", "北斗", "Galileo", "GLONASS"),
+    }
+    COLUMN_COUNT: int = 7
+    CELL_WIDTH: int = 120
+    CELL_HEIGHT: int = 35
+    MAX_VISIBLE_ROWS: int = 6
 
-            # 添加频率复选框到表格
-            for i, __band in enumerate(_bands):
-                row = i // num_cols
-                col = i % num_cols
+    def __init__(self, selected_freq: str = "", parent=None):
+        super().__init__(parent)
+        self.checked_bands: list[str] = []
+        self.custom_freqs: list[str] = []
+        self.__checked_names: set[str] = set()
+        self.__unknown_bands: list[str] = []
+        self.__band_map: dict | None = None
+        self.__init_ui()
+        self.set_selected_freq(selected_freq)
 
-                # 创建复选框
-                checkbox = QCheckBox(__band)
-                checkbox.setChecked(__band in self.checked_bands)
-                checkbox.stateChanged.connect(self.__on_checkbox_changed)
+    def set_selected_freq(self, selected_freq: str):
+        """套用已选频率并清空搜索; 频段库变化 (注册了自定义频段) 时重建分组"""
+        if FrequencyManager.get_band_map() is not self.__band_map:
+            self.__init_groups()
 
-                # 设置复选框样式，添加左边距
-                checkbox.setStyleSheet("margin-left: 10px;")
+        self.__checked_names.clear()
+        self.__unknown_bands = []
+        self.custom_freqs = []
+        for _freq in selected_freq.split(","):
+            _freq = _freq.strip()
+            if not _freq:
+                continue
+            if re.findall(r"MHz", _freq):
+                self.custom_freqs.append(_freq)
+            elif _freq in self.__band_name_set:
+                self.__checked_names.add(_freq)
+            else:
+                # 不在列表中的频段原样保留
+                self.__unknown_bands.append(_freq)
+        for _model in self.__models:
+            _model.refresh()
 
-                # 将复选框添加到表格单元格
-                table_widget.setCellWidget(row, col, checkbox)
-                self.checkboxes[__band] = checkbox
+        self.search_edit.clear()
+        self.range_edit.blockSignals(True)
+        self.range_edit.setText(", ".join(self.custom_freqs).replace(" MHz", ""))
+        self.range_edit.blockSignals(False)
+        self.range_edit.setStyleSheet("")
 
-            # 设置表格尺寸策略和固定大小
-            table_widget.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-            table_width = 7 * 120 + 2  # 固定表格宽度
-            table_height = num_rows * 35 + 2  # 计算表格总高度
-            table_widget.setFixedSize(table_width, table_height)
+    def set_row_count(self, row_count: int):
+        """同时应用到多行时在标题中提示"""
+        self.setWindowTitle("选择频率" if row_count <= 1 else f"选择频率 (应用到 {row_count} 行)")
 
-            # 将表格添加到容器
-            table_container.addWidget(table_widget)
+    def get_selected_freq(self) -> str:
+        """获取组合的频率字符串, 未选择时为空"""
+        self.checked_bands = [_name for _name in self.__band_names if _name in self.__checked_names]
+        result_parts = self.checked_bands + self.__unknown_bands + self.custom_freqs
+        return ", ".join(result_parts)
 
-            # 将表格容器添加到分组布局
-            group_layout.addLayout(table_container)
+    def __init_ui(self):
+        self.setWindowTitle("选择频率")
+        self.setModal(True)
+        self.setFixedSize(920, 750)
 
-            # 增加GroupBox的高度
-            group_box.setFixedHeight(table_height + 50)  # 表格高度 + 额外空间
+        layout = QVBoxLayout()
+        layout.setSpacing(8)  # 整体间距
+        layout.setContentsMargins(20, 15, 20, 15)  # 边距
 
-            layout.addWidget(group_box)
+        # 搜索
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索频段")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.__on_search_changed)
+        layout.addWidget(self.search_edit)
+
+        # 频率分组放在可滚动区域中, 由 __init_groups 填充
+        self.group_container = QWidget()
+        self.group_layout = QVBoxLayout(self.group_container)
+        self.group_layout.setContentsMargins(0, 0, 0, 0)
+        self.group_layout.setSpacing(8)
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        scroll_area.setWidget(self.group_container)
+        layout.addWidget(scroll_area)
+        self.__group_boxes: list[QGroupBox] = []
+        self.__models: list[BandCheckModel] = []
+        self.__proxies: list[QSortFilterProxyModel] = []
+        self.__band_names: list[str] = []
+        self.__band_name_set: set[str] = set()
+        self.__delegate = CheckItemDelegate(self)
 
         # 创建自定义频率范围分组框
         custom_group_box = QGroupBox("自定义频率")
@@ -419,8 +492,6 @@ class FrequencySelectionDialog(QDialog):
         range_layout.addWidget(left_spacer)
 
         self.range_edit = QLineEdit()
-        if self.custom_freqs:
-            self.range_edit.setText(", ".join(self.custom_freqs).replace(" MHz", ""))
         self.range_edit.setPlaceholderText("例如: 1000~2000, 3000; 用英文逗号分割来区分其他频率")
         self.range_edit.textChanged.connect(self.__on_range_changed)
         range_layout.addWidget(self.range_edit)
@@ -474,12 +545,89 @@ class FrequencySelectionDialog(QDialog):
 
         self.setLayout(layout)
 
-    def __on_checkbox_changed(self):
-        """复选框状态改变时更新选择列表"""
-        self.checked_bands.clear()
-        for _band, _checkbox in self.checkboxes.items():
-            if _checkbox.isChecked():
-                self.checked_bands.append(_band)
+    def __init_groups(self):
+        """按当前频段库构建各分组的模型与视图"""
+        # 重建时清空布局中的全部项 (含末尾的伸缩项), 并释放挂在对话框上的旧模型与代理
+        while self.group_layout.count():
+            item = self.group_layout.takeAt(0)
+            if item.widget() is not None:
+                item.widget().deleteLater()
+        for _proxy, _model in zip(self.__proxies, self.__models):
+            _proxy.deleteLater()
+            _model.deleteLater()
+        self.__group_boxes = []
+        self.__models = []
+        self.__proxies = []
+
+        band_map = FrequencyManager.get_band_map()
+        self.__band_map = band_map
+        grouped_technologies = {_technology for _technologies in self.BAND_GROUPS.values()
+                                for _technology in _technologies}
+        band_groups: dict[str, list[str]] = {
+            _name: [__band.name for __technology in _technologies for __band in band_map.get(__technology, [])]
+            for _name, _technologies in self.BAND_GROUPS.items()}
+        for _technology, _bands in band_map.items():
+            if _technology not in grouped_technologies:
+                band_groups[_technology] = [__band.name for __band in _bands]
+        self.__band_names = list(dict.fromkeys(_name for _names in band_groups.values() for _name in _names))
+        # 有序列表用于输出, 集合用于按名称查找
+        self.__band_name_set = set(self.__band_names)
+
+        for _name, _bands in band_groups.items():
+            if not _bands:
+                continue
+            # 创建分组框
+            group_box = QGroupBox(_name)
+            # 设置GroupBox标题样式 - 增大字号
+            group_box.setStyleSheet("QGroupBox { font-weight: bold; font-size: 14px; }")
+            group_layout = QVBoxLayout(group_box)
+            group_layout.setContentsMargins(10, 15, 10, 10)  # 设置GroupBox内边距
+
+            model = BandCheckModel(_bands, self.__checked_names, self)
+            proxy = QSortFilterProxyModel(self)
+            proxy.setSourceModel(model)
+            proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+            # 每格固定大小、自左向右换行排列, 超过 MAX_VISIBLE_ROWS 行时在组内滚动
+            list_view = QListView()
+            list_view.setModel(proxy)
+            list_view.setItemDelegate(self.__delegate)
+            list_view.setFlow(QListView.LeftToRight)
+            list_view.setWrapping(True)
+            list_view.setResizeMode(QListView.Adjust)
+            list_view.setUniformItemSizes(True)
+            list_view.setLayoutMode(QListView.Batched)
+            list_view.setGridSize(QSize(self.CELL_WIDTH, self.CELL_HEIGHT))
+            list_view.setSelectionMode(QListView.NoSelection)
+            list_view.setFocusPolicy(Qt.NoFocus)
+            list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+            num_rows = (len(_bands) + self.COLUMN_COUNT - 1) // self.COLUMN_COUNT  # 向上取整
+            list_view.setFixedSize(self.COLUMN_COUNT * self.CELL_WIDTH + 20,
+                                   min(num_rows, self.MAX_VISIBLE_ROWS) * self.CELL_HEIGHT + 4)
+            group_layout.addWidget(list_view)
+
+            self.group_layout.addWidget(group_box)
+            self.__group_boxes.append(group_box)
+            self.__models.append(model)
+            self.__proxies.append(proxy)
+        self.group_layout.addStretch()
+
+    def __on_search_changed(self, text: str):
+        """按名称筛选, 没有匹配项的分组隐藏"""
+        for _group_box, _proxy in zip(self.__group_boxes, self.__proxies):
+            _proxy.setFilterFixedString(text.strip())
+            _group_box.setVisible(_proxy.rowCount() > 0)
+
+    def __set_visible_checked(self, checked: bool):
+        # 只作用于当前搜索结果中可见的频段
+        for _model, _proxy in zip(self.__models, self.__proxies):
+            for __row in range(_proxy.rowCount()):
+                name = _model.band_names[_proxy.mapToSource(_proxy.index(__row, 0)).row()]
+                if checked:
+                    self.__checked_names.add(name)
+                else:
+                    self.__checked_names.discard(name)
+            _model.refresh()
 
     def __on_range_changed(self, text):
         """自定义频率范围改变时更新"""
@@ -496,14 +644,12 @@ class FrequencySelectionDialog(QDialog):
 
     def __select_all(self):
         """全选所有频率"""
-        for _checkbox in self.checkboxes.values():
-            _checkbox.setChecked(True)
+        self.__set_visible_checked(True)
 
     def __clear_all(self):
         """清除所有选择"""
-        for _checkbox in self.checkboxes.values():
-            _checkbox.setChecked(False)
-    
+        self.__set_visible_checked(False)
+
     def __is_valid_freq(self, freq_text : str):
         if not re.match("^[0-9 .~,]*$", freq_text):
             return False
@@ -521,110 +667,299 @@ class FrequencySelectionDialog(QDialog):
         return True
 
 
+class AntennaTableModel(QAbstractTableModel):
+    """
+    天线表的数据模型: 天线名称 / 频率选择 (由 FreqButtonDelegate 绘制按钮) / 已选频率 / 效率均值
+    行按需分批加载 (fetchMore), 修改只通知受影响的单元格
+    """
+    NAME_COLUMN, BUTTON_COLUMN, FREQ_COLUMN, EFF_COLUMN = range(4)
+    HEADERS: tuple[str, ...] = ("天线名称", "频率选择", "已选频率", "效率均值")
+    FETCH_SIZE: int = 128
+
+    def __init__(self, antenna_names: list[str], graph_names: list[str], parent=None):
+        super().__init__(parent)
+        self.__antenna_names = antenna_names
+        self.__graph_names = graph_names
+        self.__selected_freqs: list[str] = [""] * len(antenna_names)
+        self.__eff_texts: list[str] = [""] * len(antenna_names)
+        self.__loaded_count = min(len(antenna_names), self.FETCH_SIZE)
+        # 排序键: 名称中的数字补零, 使 Ant10 排在 Ant9 之后
+        self.__sort_keys: list[str] = [re.sub(r"\d+", lambda _match: _match[0].zfill(8), _name)
+                                       for _name in antenna_names]
+
+    @property
+    def antenna_names(self):
+        return self.__antenna_names
+
+    @property
+    def graph_names(self):
+        return self.__graph_names
+
+    @property
+    def selected_freqs(self):
+        return self.__selected_freqs
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.__loaded_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.__loaded_count < len(self.__antenna_names)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_SIZE, len(self.__antenna_names) - self.__loaded_count)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.__loaded_count, self.__loaded_count + count - 1)
+        self.__loaded_count += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if column == self.NAME_COLUMN:
+                return self.__antenna_names[row]
+            elif column == self.BUTTON_COLUMN:
+                return "选择频率"
+            elif column == self.FREQ_COLUMN:
+                return self.__selected_freqs[row] or "未选择"
+            elif column == self.EFF_COLUMN:
+                return self.__eff_texts[row]
+        elif role == Qt.ToolTipRole and column in (self.FREQ_COLUMN, self.EFF_COLUMN):
+            return self.data(index, Qt.DisplayRole)
+        elif role == Qt.UserRole:
+            # 排序键
+            if column == self.NAME_COLUMN:
+                return self.__sort_keys[row]
+            return self.data(index, Qt.DisplayRole)
+        return None
+
+    def get_antenna_table(self) -> list[tuple[str, str, str]]:
+        return list(zip(self.__antenna_names, self.__graph_names, self.__selected_freqs))
+
+    def set_selected_freq(self, row: int, freq_text: str):
+        """修改一行的已选频率, 该行的效率均值随之失效"""
+        if self.__selected_freqs[row] == freq_text:
+            return
+        self.__selected_freqs[row] = freq_text
+        self.__eff_texts[row] = ""
+        self.__emit_row_changed(row, self.FREQ_COLUMN, self.EFF_COLUMN)
+
+    def set_selected_freqs(self, freq_map: dict[str, str]):
+        for _row, _name in enumerate(self.__antenna_names):
+            if _name in freq_map:
+                self.set_selected_freq(_row, freq_map[_name])
+
+    def set_antenna_eff_map(self, antenna_eff_map: dict[str, dict[str, tuple[float]]],
+                            antenna_table: list[tuple[str, str, str]]):
+        """显示计算结果; 只更新计算时的频率选择与当前一致且内容变化的行"""
+        computed_freqs = {_antenna_name: _freq_text for _antenna_name, _, _freq_text in antenna_table}
+        for _row, _name in enumerate(self.__antenna_names):
+            if _name not in antenna_eff_map or computed_freqs.get(_name) != self.__selected_freqs[_row]:
+                continue
+            eff_text = ", ".join(f"{__freq} {'—' if __effs[3] == -1 else f'{__effs[3]:.2f}'}"
+                                 for __freq, __effs in antenna_eff_map[_name].items())
+            if eff_text != self.__eff_texts[_row]:
+                self.__eff_texts[_row] = eff_text
+                self.__emit_row_changed(_row, self.EFF_COLUMN, self.EFF_COLUMN)
+
+    def __emit_row_changed(self, row: int, first_column: int, last_column: int):
+        # 尚未加载的行没有对应的视图项, 无需通知
+        if row < self.__loaded_count:
+            self.dataChanged.emit(self.index(row, first_column), self.index(row, last_column),
+                                  [Qt.DisplayRole, Qt.ToolTipRole, Qt.UserRole])
+
+
+class FreqButtonDelegate(QStyledItemDelegate):
+    """在单元格内绘制按钮并响应点击, 代替每行一个 QPushButton 控件"""
+    clicked = Signal(QModelIndex)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.__pressed_index: QModelIndex | None = None
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 3, -4, -3)
+        button.text = index.data(Qt.DisplayRole)
+        button.state = QStyle.State_Enabled
+        if option.state & QStyle.State_MouseOver:
+            button.state |= QStyle.State_MouseOver
+        if self.__pressed_index is not None and self.__pressed_index == index:
+            button.state |= QStyle.State_Sunken
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self.__pressed_index = QModelIndex(index)
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed_index, self.__pressed_index = self.__pressed_index, None
+            if pressed_index == index and option.rect.contains(event.position().toPoint()):
+                self.clicked.emit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
 class AntennaAllocationWidget(QWidget):
+    ROW_HEIGHT: int = 36
+
     def __init__(self, cst: CST.Contents):
         super().__init__()
         self.antenna_names: list[str] = []
         self.graph_names: list[str] = []
-        self.selected_freqs: list[str] = []
+        self.__freq_dialog: FrequencySelectionDialog | None = None
         self.__init_data(cst)
         self.__init_ui()
 
+    @property
+    def selected_freqs(self) -> list[str]:
+        return self.model.selected_freqs
+
     def get_antenna_table(self) -> list[tuple[str, str, str]]:
         """获取结果路径"""
-        return [(self.antenna_names[i], self.graph_names[i], self.selected_freqs[i]) for i in
-                range(len(self.antenna_names))]
-
-    def get_height(self):
-        """计算表格的合适高度"""
-        # 获取表格行数
-        row_count = self.table_widget.rowCount()
-
-        # 计算每行的大致高度（包括行高和间距）
-        row_height = 40  # 估算每行高度
+        return self.model.get_antenna_table()
 
-        # 计算表头高度
-        header_height = 40
+    def set_selected_freqs(self, freq_map: dict[str, str]):
+        """按天线名称设置已选频段, 未出现在 freq_map 中的行保持不变"""
+        self.model.set_selected_freqs(freq_map)
 
-        # 计算表格总高度
-        table_height = header_height + (row_count * row_height)
+    def set_antenna_eff_map(self, antenna_eff_map: dict[str, dict[str, tuple[float]]],
+                            antenna_table: list[tuple[str, str, str]]):
+        """在效率均值列显示计算结果, antenna_table 为计算时使用的天线表"""
+        self.model.set_antenna_eff_map(antenna_eff_map, antenna_table)
 
-        return table_height
+    def get_height(self):
+        """计算表格的合适高度"""
+        header_height = self.table_widget.horizontalHeader().sizeHint().height()
+        return header_height + len(self.antenna_names) * self.ROW_HEIGHT + 2 * self.table_widget.frameWidth()
 
     def __init_data(self, cst: CST.Contents):
-        eff_graphs: list[CST.Graph] = CST.Graph.extract_graph(cst.model_res, "System Tot. Efficiency")
         self.antenna_names = []
-        for _graph in eff_graphs:
-            if match := re.search(r"\[AC(\d+)]", _graph.name):
-                self.antenna_names.append(f"Ant{match[1]}")
-                self.graph_names.append(_graph.name)
+        for _antenna_name, _graph_name in extract_antennas(cst):
+            self.antenna_names.append(_antenna_name)
+            self.graph_names.append(_graph_name)
         self.result_path = str(cst.project_dir)
 
     def __init_ui(self):
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(10, 10, 10, 10)
 
-        # 标题
+        # 标题与筛选
+        title_layout = QHBoxLayout()
         title_label = QLabel("天线频率配置表")
         title_label.setStyleSheet("font-size: 18px; font-weight: bold; margin: 10px;")
-        main_layout.addWidget(title_label)
-
-        # 创建表格
-        self.table_widget = QTableWidget(len(self.antenna_names), 3)
-        self.table_widget.setHorizontalHeaderLabels(["天线名称", "频率选择", "已选频率"])
-
-        # 设置表格属性 - 确保表格能够扩展填充空间
-        self.table_widget.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        self.table_widget.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        self.table_widget.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table_widget.verticalHeader().setVisible(False)
+        title_layout.addWidget(title_label)
+        title_layout.addStretch()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("筛选天线或频段")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.setFixedWidth(240)
+        self.filter_edit.textChanged.connect(self.__on_filter_changed)
+        title_layout.addWidget(self.filter_edit)
+        main_layout.addLayout(title_layout)
+
+        # 模型 → 排序/筛选代理 → 视图
+        self.model = AntennaTableModel(self.antenna_names, self.graph_names, self)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.proxy_model.setSortRole(Qt.UserRole)
+        self.proxy_model.setFilterKeyColumn(-1)
+        self.proxy_model.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.table_widget = QTableView()
+        self.table_widget.setModel(self.proxy_model)
+        self.button_delegate = FreqButtonDelegate(self.table_widget)
+        self.button_delegate.clicked.connect(self.__on_button_clicked)
+        self.table_widget.setItemDelegateForColumn(AntennaTableModel.BUTTON_COLUMN, self.button_delegate)
+        self.table_widget.setMouseTracking(True)
+        self.table_widget.setSortingEnabled(True)
+        self.table_widget.sortByColumn(-1, Qt.AscendingOrder)
+        self.table_widget.setSelectionBehavior(QTableView.SelectRows)
+        self.table_widget.setSelectionMode(QTableView.ExtendedSelection)
+        self.table_widget.setEditTriggers(QTableView.NoEditTriggers)
+
+        # 固定行高与列宽, 避免按内容逐行测量
+        vertical_header = self.table_widget.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(self.ROW_HEIGHT)
+        horizontal_header = self.table_widget.horizontalHeader()
+        horizontal_header.sortIndicatorChanged.connect(self.__on_sort_changed)
+        horizontal_header.setSectionResizeMode(QHeaderView.Interactive)
+        horizontal_header.setSectionResizeMode(AntennaTableModel.FREQ_COLUMN, QHeaderView.Stretch)
+        horizontal_header.setSectionResizeMode(AntennaTableModel.EFF_COLUMN, QHeaderView.Stretch)
+        self.table_widget.setColumnWidth(AntennaTableModel.NAME_COLUMN, 120)
+        self.table_widget.setColumnWidth(AntennaTableModel.BUTTON_COLUMN, 120)
         self.table_widget.setAlternatingRowColors(True)
 
         # 设置表格尺寸策略，使其能够扩展
         self.table_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
-        # 填充表格数据
-        for _row, _name in enumerate(self.antenna_names):
-            # 初始化该行的选择为空列表
-            self.selected_freqs.append("")
-
-            # 第一列：天线名称
-            name_item = QTableWidgetItem(_name)
-            name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
-            self.table_widget.setItem(_row, 0, name_item)
-
-            # 第二列：频率选择按钮
-            select_btn = QPushButton("选择频率")
-            select_btn.clicked.connect(lambda checked, r=_row: self.__open_freq_dialog(r))
-            self.table_widget.setCellWidget(_row, 1, select_btn)
-
-            # 第三列：已选频率显示
-            selected_item = QTableWidgetItem("未选择")
-            selected_item.setFlags(selected_item.flags() & ~Qt.ItemIsEditable)
-            self.table_widget.setItem(_row, 2, selected_item)
-
         main_layout.addWidget(self.table_widget)
 
         self.setLayout(main_layout)
 
-    def __open_freq_dialog(self, row):
-        """打开频率选择对话框"""
-        current_selection = self.selected_freqs[row]
-
-        dialog = FrequencySelectionDialog(current_selection, self)
-
-        # 对话框关闭时直接应用选择
-        dialog.finished.connect(lambda result, r=row, d=dialog: self.__on_freq_dialog_finished(result, r, d))
+    def __on_filter_changed(self, text: str):
+        # 代理只筛选已加载的行, 筛选前先加载全部
+        if text:
+            self.model.fetch_all()
+        self.proxy_model.setFilterFixedString(text)
+
+    def __on_sort_changed(self, column: int, order):
+        # 同理, 排序前先加载全部, 否则未加载的行会在滚动时追加到末尾
+        if column >= 0:
+            self.model.fetch_all()
+
+    def __on_button_clicked(self, proxy_index: QModelIndex):
+        # 点击的行属于多行选择时批量应用到所有选中的行
+        selected_indices = self.table_widget.selectionModel().selectedRows()
+        if len(selected_indices) > 1 and proxy_index.row() in {_index.row() for _index in selected_indices}:
+            proxy_indices = [proxy_index] + [_index for _index in selected_indices
+                                             if _index.row() != proxy_index.row()]
+        else:
+            proxy_indices = [proxy_index]
+        self.__open_freq_dialog([self.proxy_model.mapToSource(_index).row() for _index in proxy_indices])
+
+    def get_freq_dialog(self) -> FrequencySelectionDialog:
+        """复用的频率选择对话框, 首次调用时构建"""
+        if self.__freq_dialog is None:
+            self.__freq_dialog = FrequencySelectionDialog("", self)
+        return self.__freq_dialog
+
+    def __open_freq_dialog(self, rows: list[int]):
+        """打开频率选择对话框, 以第一行的选择为初始状态"""
+        dialog = self.get_freq_dialog()
+        dialog.set_selected_freq(self.model.selected_freqs[rows[0]])
+        dialog.set_row_count(len(rows))
         dialog.exec()
 
-    def __on_freq_dialog_finished(self, result, row, dialog):
-        """频率选择对话框关闭时的处理"""
         # 无论对话框如何关闭，都更新选择
         selected_freq = dialog.get_selected_freq()
-        self.selected_freqs[row] = selected_freq
-
-        # 更新表格显示
-        self.table_widget.item(row, 2).setText(selected_freq)
+        for _row in rows:
+            self.model.set_selected_freq(_row, selected_freq)
 
 
 class PathSelectionWidget(QWidget):
@@ -639,6 +974,9 @@ class PathSelectionWidget(QWidget):
         self.result_path = self.path_edit.text()
         return self.result_path
 
+    def set_path(self, path: str):
+        self.path_edit.setText(path)
+
     def __init_data(self, cst: CST.Contents):
         self.result_path = str(cst.project_dir)
 
@@ -692,3 +1030,79 @@ class PathSelectionWidget(QWidget):
             self.path_edit.setStyleSheet("border: 1px solid #4CAF50;")  # 清除错误样式
         else:
             self.path_edit.setStyleSheet("border: 1px solid red;")  # 设置错误样式
+
+
+class PresetSelectionWidget(QWidget):
+    """命名预设: 保存当前天线表的频段选择, 或套用到当前工程"""
+    applied = Signal(str)
+
+    def __init__(self, project_config: ProjectConfig, antenna_allocation: AntennaAllocationWidget):
+        super().__init__()
+        self.project_config = project_config
+        self.antenna_allocation = antenna_allocation
+        self.__init_ui()
+
+    def get_preset_name(self) -> str:
+        return self.preset_combo.currentText()
+
+    def set_preset_name(self, preset_name: str):
+        index = self.preset_combo.findText(preset_name)
+        if index >= 0:
+            self.preset_combo.setCurrentIndex(index)
+
+    def __init_ui(self):
+        main_layout = QHBoxLayout()
+
+        preset_label = QLabel("预设:")
+        preset_label.setStyleSheet("font-weight: bold;")
+
+        self.preset_combo = QComboBox()
+        self.preset_combo.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.__reload_presets()
+
+        apply_btn = QPushButton("套用预设")
+        apply_btn.clicked.connect(self.__apply_preset)
+
+        save_btn = QPushButton("保存预设")
+        save_btn.clicked.connect(self.__save_preset)
+
+        delete_btn = QPushButton("删除预设")
+        delete_btn.clicked.connect(self.__delete_preset)
+
+        main_layout.addWidget(preset_label)
+        main_layout.addWidget(self.preset_combo)
+        main_layout.addWidget(apply_btn)
+        main_layout.addWidget(save_btn)
+        main_layout.addWidget(delete_btn)
+
+        self.setLayout(main_layout)
+
+    def __reload_presets(self, current_name: str = ""):
+        self.preset_combo.clear()
+        self.preset_combo.addItems(self.project_config.select_preset_names())
+        self.set_preset_name(current_name)
+
+    def __apply_preset(self):
+        """套用所选预设"""
+        preset_name = self.get_preset_name()
+        if not preset_name:
+            return
+        self.antenna_allocation.set_selected_freqs(self.project_config.load_preset(preset_name))
+        self.applied.emit(preset_name)
+
+    def __save_preset(self):
+        """将当前频段选择保存为预设"""
+        preset_name, ok = QInputDialog.getText(self, "保存预设", "预设名称:", text=self.get_preset_name())
+        preset_name = preset_name.strip()
+        if not (ok and preset_name):
+            return
+        self.project_config.save_preset(preset_name, self.antenna_allocation.get_antenna_table())
+        self.__reload_presets(preset_name)
+
+    def __delete_preset(self):
+        """删除所选预设"""
+        preset_name = self.get_preset_name()
+        if not preset_name:
+            return
+        self.project_config.delete_preset(preset_name)
+        self.__reload_presets()